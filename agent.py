@@ -1,31 +1,44 @@
 import os
 import re
+import sys
+import asyncio
+import aiohttp
 import requests
-import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import orjson
 import base64
+import copy
+import hashlib
 import io
+import logging
+import threading
+from types import MappingProxyType
+from typing import Optional
+from functools import cached_property, lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image
-from langchain_core.messages import HumanMessage
-from langchain_openai import ChatOpenAI
-from langchain.agents import create_react_agent, AgentExecutor
-from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain.schema.runnable import RunnableLambda, RunnablePassthrough
-from langchain.chains import LLMChain
-from langchain.prompts import PromptTemplate
-from langchain.tools import Tool
-from langchain.agents import initialize_agent, AgentType
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 from dotenv import load_dotenv
-from checkDMARC import *
-from serperSearch import *
-from educationalModuleRAG import *
+from cachetools import LRUCache, TTLCache
+from checkDMARC import checkDMARC
+from serperSearch import generate_phone_number_variants, checkPhoneLogic
 from agent_orchestrator import AgentOrchestrator, ThreatSignal, InputType
-from voice_analysis import VoiceScamAnalyzer
-from cyber_news import CyberNewsIntelligence
-from deepfake_detection import DeepfakeDetector
+from llm_cache import LLMCache
+from request_coalescer import RequestCoalescer
+
+logger = logging.getLogger(__name__)
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Prefer uvloop's event loop for the async wrapper fan-out when available
+try:
+    import uvloop
+    uvloop.install()
+except ImportError:
+    pass
+
 requests.packages.urllib3.disable_warnings()
 SERPER_API_KEY=os.environ.get('SERPER_API_KEY')
 
@@ -35,36 +48,313 @@ url_hause_key = os.environ.get('URL_HAUSE_KEY')
 if not SERPER_API_KEY or not openai_api_key:
     raise ValueError("API keys not found. Please set SERPER_API_KEY and OPENAI_API_KEY environment variables.")
 
+# Phone search answers end with a fixed verdict token; only that token is scored,
+# since the prose repeats words like "scam" even when ruling them out
+_PHONE_VERDICT_RE = re.compile(r"VERDICT:\s*(SCAM|SUSPICIOUS|SAFE|UNKNOWN)\b", re.I)
+_PHONE_VERDICT_SCORES = MappingProxyType({'SCAM': 75, 'SUSPICIOUS': 50, 'SAFE': 15, 'UNKNOWN': 40})
+_SCORE_RE = re.compile(r'\d+')
+
+# CLI extraction: email, domain and phone candidates harvested in one scan
+_EXTRACTORS_RE = re.compile(
+    r'(?P<email>\b[A-Za-z0-9._%+-]+@(?P<email_domain>[A-Za-z0-9.-]+\.[a-zA-Z]{2,})\b)'
+    r'|(?P<domain>\b[a-z0-9][a-z0-9.-]*\.[a-z]{2,}\b)'
+    r'|(?P<phone>\+?\d[\d -]{8,15}\d)',
+    re.IGNORECASE
+)
+_SCHEME_RE = re.compile(r'^https?://')
+# Seconds allowed per threat-intel (VirusTotal / URLhaus) request, sync or async
+THREAT_INTEL_TIMEOUT = 10
+# Whole-word image request keywords (so e.g. "imagine" does not trigger image mode)
+_IMAGE_KEYWORDS_RE = re.compile(r'\b(?:img|screenshot|image)\b', re.IGNORECASE)
+_COMMANDS = frozenset({'quit', 'file', 'education_mode'})
+_MAX_COMMAND_LEN = max(map(len, _COMMANDS))
+
+# Message-analysis risk tiers (checked in order, first match wins)
+_TIER_RE = {
+    'high': re.compile(r"phishing|scam|malicious|dangerous|fraud", re.I),
+    'medium': re.compile(r"suspicious|concerning|caution|warning", re.I),
+    'low': re.compile(r"legitimate|safe|normal|benign", re.I)
+}
+_TIER_SCORES = {'high': 75, 'medium': 50, 'low': 15}
+
+# Prompt templates, compiled once per agent in __init__
+_DOMAIN_TEMPLATE = """
+        Analyze the following JSON data from two domain scan sources:
+        VirusTotal scan: {JSON_DATA_Virus_Total}
+        URLhaus scan: {JSON_DATA_URL_HOUSE}
+
+        Based on the analysis, generate a brief assessment following these rules:
+        1. Start with "Based on related databases, domain identified as [malicious/suspicious/secure]"
+        2. Use "malicious" if VirusTotal malicious count > 0 or URLhaus query_status is "ok"
+        3. Use "suspicious" if VirusTotal suspicious count > 0 or undetected count is high
+        4. Use "secure" if VirusTotal harmless count is high and malicious/suspicious counts are 0, and URLhaus query_status is "no_results"
+        5. Highlight the URL status as online/offline/unknown from URLhaus data
+        6. Check the blacklists key in URLhaus data and highlight if the domain is identified as a spammer domain, phishing domain, botnet C&C domain, compromised website, or not listed
+        7. Provide a short summary of up to 10 words
+        8. Add a brief description if needed, focusing on key findings
+
+        Output the assessment in a concise paragraph.
+        """
+
+_PHONE_SCORE_TEMPLATE = """Based on this phone number analysis, provide a risk score (0-100):
+            
+Analysis: {result}
+
+Consider:
+- Mentions of scam/fraud: high score
+- Negative reviews: medium-high score  
+- No information: low score
+- Positive reviews: very low score
+
+Respond with just a number 0-100:"""
+
+_PHONE_SEARCH_TEMPLATE = """{Search_Data_Brave} \n\nPlease answer the user's question using only information from the search results. Include links to the relevant search result URLs within your answer. Keep your answer concise.
+
+        User's question: Can you identify whether telephone number variants contains in this list {Phone_Number_Variants} is used for scams, phishing, or other suspicious activities? Highlight if the number is unsafe or write that there needs to be more information or if negative reviews and comments were not recorded in the first ten search results sites. 
+
+        End your answer with a final line that is exactly one of: VERDICT: SCAM, VERDICT: SUSPICIOUS, VERDICT: SAFE, VERDICT: UNKNOWN
+
+        Assistant:
+        """
+
+_MESSAGE_TEMPLATE = """
+        Analyze the following message for potential phishing attempts:
+        Message: {message}
+
+        Provide your analysis, highlighting any suspicious elements:
+        If message contains domain or email than also call Domain Analyzer tool, if contains phone number than call Phone Number Analyzer Tool
+        """
+
+# Recommendation tables (read-only; callers receive list copies)
+_VOICE_RECS_EN = MappingProxyType({
+    'high': (
+        "Do not provide any personal or financial information",
+        "Hang up immediately",
+        "Report the number to your phone carrier and FTC",
+        "Block the number"
+    ),
+    'medium': (
+        "Do not share sensitive information",
+        "Verify caller identity through official channels",
+        "End the call if pressure tactics are used",
+        "Document the call details"
+    ),
+    'low': (
+        "Verify caller identity if unsure",
+        "Use official contact methods to confirm requests",
+        "Trust your instincts"
+    ),
+    'minimal': (
+        "Call appears legitimate based on analysis",
+        "Standard caution still advised",
+        "Verify any unusual requests independently"
+    )
+})
+
+_VOICE_RECS_HI = MappingProxyType({
+    'high': (
+        "कोई भी व्यक्तिगत या वित्तीय जानकारी प्रदान न करें",
+        "तुरंत कॉल काट दें",
+        "नंबर को अपने फ़ोन कैरियर और FTC को रिपोर्ट करें",
+        "नंबर को ब्लॉक करें"
+    ),
+    'medium': (
+        "संवेदनशील जानकारी साझा न करें",
+        "आधिकारिक चैनलों के माध्यम से कॉलर की पहचान सत्यापित करें",
+        "दबाव की रणनीति का उपयोग किए जाने पर कॉल समाप्त करें",
+        "कॉल विवरण दस्तावेज़ करें"
+    ),
+    'low': (
+        "अनिश्चित होने पर कॉलर की पहचान सत्यापित करें",
+        "अनुरोधों की पुष्टि के लिए आधिकारिक संपर्क विधियों का उपयोग करें",
+        "अपनी प्रवृत्ति पर भरोसा करें"
+    ),
+    'minimal': (
+        "विश्लेषण के आधार पर कॉल वैध प्रतीत होती है",
+        "मानक सावधानी अभी भी सलाह दी जाती है",
+        "किसी भी असामान्य अनुरोध को स्वतंत्र रूप से सत्यापित करें"
+    )
+})
+
+_DEEPFAKE_RECS_EN = MappingProxyType({
+    'high': (
+        "Media shows signs of manipulation",
+        "Verify source through independent channels",
+        "Do not share or amplify without verification",
+        "Consider professional forensic analysis"
+    ),
+    'medium': (
+        "Analysis inconclusive - exercise caution",
+        "Verify authenticity before trusting content",
+        "Look for corroborating sources",
+        "Consider context and source credibility"
+    ),
+    'minimal': (
+        "Media appears authentic based on analysis",
+        "Standard verification practices still apply",
+        "Remain aware of manipulation possibilities"
+    )
+})
+
+_DEEPFAKE_RECS_HI = MappingProxyType({
+    'high': (
+        "मीडिया में हेरफेर के संकेत दिखाई देते हैं",
+        "स्वतंत्र चैनलों के माध्यम से स्रोत सत्यापित करें",
+        "सत्यापन के बिना साझा या प्रवर्धित न करें",
+        "पेशेवर फोरेंसिक विश्लेषण पर विचार करें"
+    ),
+    'medium': (
+        "विश्लेषण अनिर्णायक - सावधानी बरतें",
+        "सामग्री पर भरोसा करने से पहले प्रामाणिकता सत्यापित करें",
+        "पुष्टि करने वाले स्रोतों की तलाश करें",
+        "संदर्भ और स्रोत विश्वसनीयता पर विचार करें"
+    ),
+    'minimal': (
+        "विश्लेषण के आधार पर मीडिया प्रामाणिक प्रतीत होता है",
+        "मानक सत्यापन प्रथाएं अभी भी लागू होती हैं",
+        "हेरफेर की संभावनाओं के प्रति जागरूक रहें"
+    )
+})
+
+_DEEPFAKE_VERDICT_HI = MappingProxyType({
+    'Likely Authentic': 'संभावित रूप से वास्तविक',
+    'Likely Manipulated': 'संभावित रूप से छेड़छाड़ की गई',
+    'Potentially Manipulated': 'संभावित रूप से छेड़छाड़ की गई',
+    'Uncertain': 'अनिश्चित',
+    'No faces detected': 'कोई चेहरा नहीं मिला'
+})
+
+
+@lru_cache(maxsize=128)
+def _localize_verdict(verdict: str, language: str) -> str:
+    """Translate a deepfake verdict for the requested language"""
+    if language != 'hi':
+        return verdict
+    return _DEEPFAKE_VERDICT_HI.get(verdict, verdict)
+
+
+def _phone_verdict_score(result: str) -> Optional[float]:
+    """Risk score from the answer's last VERDICT token, or None when it has none"""
+    verdicts = _PHONE_VERDICT_RE.findall(result)
+    if not verdicts:
+        return None
+    return _PHONE_VERDICT_SCORES[verdicts[-1].upper()]
+
 
 class CybersecurityAgent:
-    def __init__(self):
+    def __init__(self, use_llm_scoring: bool = False):
+        self.use_llm_scoring = use_llm_scoring
         self.openai_api_key = os.environ.get('OPENAI_API_KEY')
         self.vt_api_key = os.environ.get('VT_API_KEY')
 
         if not self.openai_api_key or not self.vt_api_key or not SERPER_API_KEY:
             raise ValueError("API keys not found. Please set OPENAI_API_KEY and VT_API_KEY and SERPER_API_KEY environment variables.")
 
+        # Pooled HTTP session for threat-intel APIs (keep-alive + retry on transient errors)
+        self.http = requests.Session()
+        retry = Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=frozenset({'GET', 'POST'}),
+            raise_on_status=False
+        )
+        self.http.mount('https://', HTTPAdapter(pool_maxsize=32, max_retries=retry))
+
         self.llm = ChatOpenAI(model="gpt-4o", openai_api_key=self.openai_api_key, temperature=0)
         self.vision_llm = ChatOpenAI(model="gpt-4o", openai_api_key=self.openai_api_key, temperature=0)
+        self.llm_cache = LLMCache(ttl=3600)
+        # Concurrent lookups of the same URL share one threat-intel request
+        self.coalescer = RequestCoalescer()
+        # Completed agentic analyses, keyed by input content
+        self._analysis_cache = TTLCache(maxsize=1024, ttl=900)
+        self._analysis_lock = threading.Lock()
+        # Query embeddings, shared by every consumer that embeds the same input text
+        self._embedding_cache = LRUCache(maxsize=256)
+        self._embedding_lock = threading.Lock()
         
-        # Initialize voice analyzer
-        self.voice_analyzer = VoiceScamAnalyzer()
+        # Reusable prompt chains (deterministic prompts go through the LLM cache)
+        # LangChain's prompt/runnable stack is imported here rather than at module load
+        from langchain.prompts import PromptTemplate
+        from langchain.schema.runnable import RunnableLambda
+        self._domain_chain = PromptTemplate(
+            template=_DOMAIN_TEMPLATE,
+            input_variables=["JSON_DATA_Virus_Total", "JSON_DATA_URL_HOUSE"]
+        ) | RunnableLambda(self.cached_invoke)
+        self._phone_score_chain = PromptTemplate(
+            template=_PHONE_SCORE_TEMPLATE,
+            input_variables=["result"]
+        ) | RunnableLambda(self.cached_invoke)
+        self._phone_chain = PromptTemplate(
+            template=_PHONE_SEARCH_TEMPLATE,
+            input_variables=["Search_Data_Brave", "Phone_Number_Variants"]
+        ) | RunnableLambda(self.cached_invoke)
+        self._message_prompt = PromptTemplate(template=_MESSAGE_TEMPLATE, input_variables=["message"])
+        self._message_chain = self._message_prompt | RunnableLambda(self.cached_invoke)
         
-        # Initialize cyber news intelligence
-        self.news_intel = CyberNewsIntelligence()
+        # Voice, news and deepfake components are created on first use (see properties below)
         self.cached_news = []  # Cache news for session
         
-        # Initialize deepfake detector
-        self.deepfake_detector = DeepfakeDetector()
-        
         # Initialize orchestrator with tool wrappers
+        self.tool_wrappers = self._create_tool_wrappers()
+        self.async_tool_wrappers = self._create_async_tool_wrappers()
         self.orchestrator = AgentOrchestrator(
             llm=self.llm,
-            tools_dict=self._create_tool_wrappers()
+            tools_dict=self.tool_wrappers,
+            tool_runner=self._collect_signals,
+            llm_invoke=self.cached_invoke
         )
         
         self.setup_agent()
     
+    def __del__(self):
+        http = getattr(self, 'http', None)
+        if http is not None:
+            http.close()
+    
+    @cached_property
+    def voice_analyzer(self):
+        """Voice scam analyzer, imported on first use"""
+        from voice_analysis import VoiceScamAnalyzer
+        return VoiceScamAnalyzer()
+    
+    @cached_property
+    def news_intel(self):
+        """Cyber news intelligence, imported on first use"""
+        from cyber_news import CyberNewsIntelligence
+        return CyberNewsIntelligence(embedder=self.embeddings)
+    
+    @cached_property
+    def embeddings(self):
+        """Embedding client shared by the agent and news correlation"""
+        return OpenAIEmbeddings(model="text-embedding-3-small", openai_api_key=self.openai_api_key)
+    
+    def embed_query(self, text: str):
+        """
+        Embed text once and memoize it, so every semantic consumer of the
+        same input reuses one embedding call. Returns None if embedding fails
+        """
+        with self._embedding_lock:
+            vector = self._embedding_cache.get(text)
+        if vector is not None:
+            return vector
+        
+        try:
+            vector = self.embeddings.embed_query(text)
+        except Exception:
+            logger.exception("Query embedding failed")
+            return None
+        
+        with self._embedding_lock:
+            self._embedding_cache[text] = vector
+        return vector
+    
+    @cached_property
+    def deepfake_detector(self):
+        """Deepfake detector (OpenCV), imported on first use"""
+        from deepfake_detection import DeepfakeDetector
+        return DeepfakeDetector()
+    
     def _create_tool_wrappers(self):
         """
         Create tool wrappers that return ThreatSignal objects
@@ -80,97 +370,156 @@ class CybersecurityAgent:
             'news_correlation': self._news_wrapper
         }
     
+    def _create_async_tool_wrappers(self):
+        """
+        Native async wrappers for HTTP-bound tools
+        They share the fan-out's aiohttp session; every other tool runs on a worker thread
+        """
+        return {
+            'virustotal': self._virustotal_wrapper_async,
+            'urlhaus': self._urlhaus_wrapper_async
+        }
+    
+    def _collect_signals(self, tool_names, user_input):
+        """
+        Run the selected tool wrappers concurrently
+        The wrappers are independent I/O-bound calls, so total latency is
+        bounded by the slowest one instead of the sum of all of them
+        """
+        return asyncio.run(self._run_wrappers(tool_names, user_input))
+    
+    async def _run_wrappers(self, names, arg):
+        """Fan out wrappers in one event loop and gather their signals in order"""
+        # One connector per fan-out so all HTTP wrappers share its connection pool
+        connector = aiohttp.TCPConnector(limit=64, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=THREAT_INTEL_TIMEOUT)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            tasks = [
+                asyncio.create_task(self._invoke_wrapper(name, arg, session))
+                for name in names
+            ]
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+        
+        signals = []
+        for name, result in zip(names, results):
+            if isinstance(result, BaseException):
+                # Log but don't fail entire analysis
+                logger.error("Tool %s failed", name, exc_info=result)
+            elif result:
+                signals.append(result)
+        return signals
+    
+    async def _invoke_wrapper(self, name, arg, session):
+        """Await the async twin of a wrapper if there is one, else run it on a thread"""
+        async_wrapper = self.async_tool_wrappers.get(name)
+        if async_wrapper:
+            return await async_wrapper(arg, session)
+        return await asyncio.to_thread(self.tool_wrappers[name], arg)
+    
     def _virustotal_wrapper(self, url: str) -> ThreatSignal:
         """Wrapper for VirusTotal that returns structured signal"""
         try:
-            vt_data = self.queryVirusTotal(url)
-            if vt_data.startswith("Error:"):
-                return None
-            
-            # Parse VT response
-            vt_json = json.loads(vt_data)
-            stats = vt_json.get('data', {}).get('attributes', {}).get('last_analysis_stats', {})
-            
-            malicious = stats.get('malicious', 0)
-            suspicious = stats.get('suspicious', 0)
-            harmless = stats.get('harmless', 0)
-            total = malicious + suspicious + harmless
-            
-            # Calculate score (0-100)
-            if total > 0:
-                score = ((malicious * 2 + suspicious) / total) * 100
-            else:
-                score = 0
-            
-            # Confidence based on number of engines
-            confidence = min(70 + (total / 10), 95)
-            
-            evidence = f"{malicious}/{total} engines flagged as malicious"
-            
-            return ThreatSignal(
-                source='VirusTotal',
-                score=score,
-                confidence=confidence,
-                evidence=evidence,
-                raw_data=stats
+            return self._virustotal_signal(
+                self.coalescer.run(('virustotal', url), self.queryVirusTotal, url)
             )
         except Exception as e:
-            print(f"VirusTotal wrapper error: {e}")
+            logger.exception("VirusTotal wrapper failed")
             return None
     
+    async def _virustotal_wrapper_async(self, url: str, session) -> ThreatSignal:
+        """Async twin of _virustotal_wrapper"""
+        try:
+            return self._virustotal_signal(
+                await self.coalescer.run_async(('virustotal', url), self.queryVirusTotalAsync, url, session)
+            )
+        except Exception as e:
+            logger.exception("VirusTotal wrapper failed")
+            return None
+    
+    def _virustotal_signal(self, vt_data: str) -> ThreatSignal:
+        """Convert a VirusTotal report into a structured signal"""
+        if vt_data.startswith("Error:"):
+            return None
+        
+        # Parse VT response
+        vt_json = orjson.loads(vt_data)
+        attributes = vt_json.get('data', {}).get('attributes', {})
+        # URL objects carry last_analysis_stats; fresh analyses (POST fallback) carry stats
+        stats = attributes.get('last_analysis_stats') or attributes.get('stats', {})
+        
+        malicious = stats.get('malicious', 0)
+        suspicious = stats.get('suspicious', 0)
+        harmless = stats.get('harmless', 0)
+        total = malicious + suspicious + harmless
+        
+        # Calculate score (0-100)
+        if total > 0:
+            score = ((malicious * 2 + suspicious) / total) * 100
+        else:
+            score = 0
+        
+        # Confidence based on number of engines
+        confidence = min(70 + (total / 10), 95)
+        
+        evidence = f"{malicious}/{total} engines flagged as malicious"
+        
+        return ThreatSignal(
+            source='VirusTotal',
+            score=score,
+            confidence=confidence,
+            evidence=evidence,
+            raw_data=stats
+        )
+    
     def _urlhaus_wrapper(self, url: str) -> ThreatSignal:
         """Wrapper for URLhaus that returns structured signal"""
         try:
-            urlhaus_data = self.queryUrlHause(url)
-            
-            if urlhaus_data == "No results":
-                return ThreatSignal(
-                    source='URLhaus',
-                    score=0,
-                    confidence=80,
-                    evidence="Not listed in URLhaus database (positive indicator)",
-                    raw_data=None
-                )
-            elif "Something went wrong" in urlhaus_data:
-                return None
-            else:
-                # URL is in URLhaus - high risk
-                return ThreatSignal(
-                    source='URLhaus',
-                    score=90,
-                    confidence=95,
-                    evidence="Listed in URLhaus malware database",
-                    raw_data=json.loads(urlhaus_data) if urlhaus_data else None
-                )
+            return self._urlhaus_signal(
+                self.coalescer.run(('urlhaus', url), self.queryUrlHause, url)
+            )
+        except Exception as e:
+            logger.exception("URLhaus wrapper failed")
+            return None
+    
+    async def _urlhaus_wrapper_async(self, url: str, session) -> ThreatSignal:
+        """Async twin of _urlhaus_wrapper"""
+        try:
+            return self._urlhaus_signal(
+                await self.coalescer.run_async(('urlhaus', url), self.queryUrlHauseAsync, url, session)
+            )
         except Exception as e:
-            print(f"URLhaus wrapper error: {e}")
+            logger.exception("URLhaus wrapper failed")
             return None
     
+    def _urlhaus_signal(self, urlhaus_data: str) -> ThreatSignal:
+        """Convert a URLhaus lookup into a structured signal"""
+        if urlhaus_data == "No results":
+            return ThreatSignal(
+                source='URLhaus',
+                score=0,
+                confidence=80,
+                evidence="Not listed in URLhaus database (positive indicator)",
+                raw_data=None
+            )
+        elif "Something went wrong" in urlhaus_data:
+            return None
+        else:
+            # URL is in URLhaus - high risk
+            return ThreatSignal(
+                source='URLhaus',
+                score=90,
+                confidence=95,
+                evidence="Listed in URLhaus malware database",
+                raw_data=orjson.loads(urlhaus_data) if urlhaus_data else None
+            )
+    
     def _phone_wrapper(self, phone: str) -> ThreatSignal:
         """Wrapper for phone analysis that returns structured signal"""
         try:
             result = self.analyze_phone(phone)
             
-            # Use LLM to score the phone analysis
-            score_prompt = f"""Based on this phone number analysis, provide a risk score (0-100):
-            
-Analysis: {result}
-
-Consider:
-- Mentions of scam/fraud: high score
-- Negative reviews: medium-high score  
-- No information: low score
-- Positive reviews: very low score
-
-Respond with just a number 0-100:"""
-            
-            score_response = self.llm.invoke(score_prompt)
-            score_text = score_response.content if hasattr(score_response, 'content') else str(score_response)
-            
-            try:
-                score = float(re.search(r'\d+', score_text).group())
-            except:
-                score = 50  # Default if parsing fails
+            # Score locally; only ambiguous results fall back to the LLM when enabled
+            score = self._score_phone_result(result)
             
             return ThreatSignal(
                 source='Phone Search',
@@ -180,32 +529,35 @@ Respond with just a number 0-100:"""
                 raw_data=None
             )
         except Exception as e:
-            print(f"Phone wrapper error: {e}")
+            logger.exception("Phone wrapper failed")
             return None
     
+    def _score_phone_result(self, result: str) -> float:
+        """Map a phone search summary to a 0-100 risk score"""
+        score = _phone_verdict_score(result)
+        if score is not None:
+            return score
+        
+        if not self.use_llm_scoring:
+            return 40
+        
+        score_text = self._phone_score_chain.invoke({"result": result})
+        
+        try:
+            return float(_SCORE_RE.search(score_text).group())
+        except:
+            return 40  # Default if parsing fails
+    
     def _llm_wrapper(self, text: str) -> ThreatSignal:
         """Wrapper for LLM analysis that returns structured signal"""
         try:
             analysis = self.analyze_message(text)
             
             # Extract risk indicators from LLM response
-            analysis_lower = analysis.lower()
-            
-            risk_keywords = {
-                'high': ['phishing', 'scam', 'malicious', 'dangerous', 'fraud'],
-                'medium': ['suspicious', 'concerning', 'caution', 'warning'],
-                'low': ['legitimate', 'safe', 'normal', 'benign']
-            }
-            
             score = 30  # Default
-            for level, keywords in risk_keywords.items():
-                if any(kw in analysis_lower for kw in keywords):
-                    if level == 'high':
-                        score = 75
-                    elif level == 'medium':
-                        score = 50
-                    else:
-                        score = 15
+            for level, rx in _TIER_RE.items():
+                if rx.search(analysis):
+                    score = _TIER_SCORES[level]
                     break
             
             return ThreatSignal(
@@ -216,7 +568,7 @@ Respond with just a number 0-100:"""
                 raw_data=None
             )
         except Exception as e:
-            print(f"LLM wrapper error: {e}")
+            logger.exception("LLM wrapper failed")
             return None
     
     def _voice_wrapper(self, audio_path: str) -> ThreatSignal:
@@ -242,7 +594,7 @@ Respond with just a number 0-100:"""
                 raw_data=result
             )
         except Exception as e:
-            print(f"Voice wrapper error: {e}")
+            logger.exception("Voice wrapper failed")
             return None
     
     def _deepfake_wrapper(self, media_path: str) -> ThreatSignal:
@@ -276,7 +628,7 @@ Respond with just a number 0-100:"""
                 raw_data=result
             )
         except Exception as e:
-            print(f"Deepfake wrapper error: {e}")
+            logger.exception("Deepfake wrapper failed")
             return None
     
     def _news_wrapper(self, input_text: str) -> ThreatSignal:
@@ -286,8 +638,10 @@ Respond with just a number 0-100:"""
             if not self.cached_news:
                 self.cached_news = self.news_intel.fetch_recent_threats(days_back=7, max_results=20)
             
-            # Check for correlation
-            correlation = self.news_intel.correlate_with_analysis(input_text, self.cached_news)
+            # Check for correlation (news embeddings are indexed once per fetch)
+            correlation = self.news_intel.correlate_semantic(
+                input_text, self.cached_news, query_embedding=self.embed_query(input_text)
+            )
             
             if correlation and correlation.get('related'):
                 # Related to recent threat news = higher risk
@@ -308,92 +662,161 @@ Respond with just a number 0-100:"""
                     raw_data=None
                 )
         except Exception as e:
-            print(f"News wrapper error: {e}")
+            logger.exception("News wrapper failed")
             return None
 
 
     def queryUrlHause(self, url):
-        if not url.startswith('http://') and not url.startswith('https://'):
-            url = 'https://' + url
-        
         if not url_hause_key:
             return "Error: URL_HAUSE_KEY environment variable not set."
         
-        data = {'url': url}
         headers = {
             'Auth-Key': url_hause_key
         }
         
-        response = requests.post('https://urlhaus-api.abuse.ch/v1/url/', headers=headers, data=data)
-        json_response = response.json()
-        
-        if json_response['query_status'] == 'ok':
-            return json.dumps(json_response, indent=4, sort_keys=False)
-        elif json_response['query_status'] == 'no_results':
-            url = 'http://' + url[8:]
-            response = requests.post('https://urlhaus-api.abuse.ch/v1/url/', headers=headers, data={'url': url})
-            json_response = response.json()
+        # Try the given (or https) scheme first; only probe the other one on no_results
+        for candidate in self._urlhaus_candidates(url):
+            response = self.http.post('https://urlhaus-api.abuse.ch/v1/url/', headers=headers, data={'url': candidate}, timeout=THREAT_INTEL_TIMEOUT)
+            json_response = orjson.loads(response.content)
             if json_response['query_status'] == 'ok':
-                return json.dumps(json_response, indent=4, sort_keys=False)
-            elif json_response['query_status'] == 'no_results':
-                return "No results"
-            else:
+                return orjson.dumps(json_response, option=orjson.OPT_INDENT_2).decode()
+            if json_response['query_status'] != 'no_results':
                 return "Something went wrong"
-        else:
-            return "Something went wrong"
+        return "No results"
 
+    @staticmethod
+    def _urlhaus_candidates(url):
+        """Both scheme variants of a URL, the given (or https) one first"""
+        host = _SCHEME_RE.sub('', url)
+        if url.startswith('http://'):
+            return ('http://' + host, 'https://' + host)
+        return ('https://' + host, 'http://' + host)
 
     def queryVirusTotal(self, url):
+        headers = {
+            'x-apikey': self.vt_api_key,
+            'Content-Type': 'application/x-www-form-urlencoded'
+        }
+        # Known URLs: fetch the stored report directly (one round trip)
+        response = self.http.get(self._vt_url_endpoint(url), headers=headers, timeout=THREAT_INTEL_TIMEOUT)
+        if response.status_code == 200:
+            return response.text
+        if response.status_code != 404:
+            # Bad key, quota or server error: no report, not a clean one
+            return f"Error: VT HTTP {response.status_code}"
+        
+        # Unknown URL: submit it and fetch the analysis it produced
         VTapiEndpoint = "https://www.virustotal.com/api/v3/urls"
         payload = f'url={url}'
+        response = self.http.post(VTapiEndpoint, headers=headers, data=payload, timeout=THREAT_INTEL_TIMEOUT)
+        if response.status_code != 200:
+            return f"Error: VT HTTP {response.status_code}"
+        try:
+            VTurlID = orjson.loads(response.content)["data"]["links"]["self"]
+        except KeyError:
+            return "Error: Invalid response data from VirusTotal API"
+        response = self.http.get(VTurlID, headers=headers, timeout=THREAT_INTEL_TIMEOUT)
+        if response.status_code != 200:
+            return f"Error: VT HTTP {response.status_code}"
+        return response.text
+
+    @staticmethod
+    def _vt_url_endpoint(url):
+        """VirusTotal URL object endpoint (ID is unpadded urlsafe base64 of the URL)"""
+        url_id = base64.urlsafe_b64encode(url.encode()).rstrip(b'=').decode()
+        return f"https://www.virustotal.com/api/v3/urls/{url_id}"
+
+    async def queryUrlHauseAsync(self, url, session):
+        """Async twin of queryUrlHause; both schemes are probed concurrently"""
+        if not url_hause_key:
+            return "Error: URL_HAUSE_KEY environment variable not set."
+        
+        headers = {
+            'Auth-Key': url_hause_key
+        }
+        
+        async def lookup(candidate):
+            async with session.post('https://urlhaus-api.abuse.ch/v1/url/', headers=headers, data={'url': candidate}) as response:
+                return await response.json(content_type=None, loads=orjson.loads)
+        
+        responses = await asyncio.gather(*(lookup(c) for c in self._urlhaus_candidates(url)))
+        
+        for json_response in responses:
+            if json_response['query_status'] == 'ok':
+                return orjson.dumps(json_response, option=orjson.OPT_INDENT_2).decode()
+        if all(r['query_status'] == 'no_results' for r in responses):
+            return "No results"
+        return "Something went wrong"
+
+    async def queryVirusTotalAsync(self, url, session):
+        """Async twin of queryVirusTotal using the fan-out's aiohttp session"""
         headers = {
             'x-apikey': self.vt_api_key,
             'Content-Type': 'application/x-www-form-urlencoded'
         }
-        response = requests.post(VTapiEndpoint, headers=headers, data=payload)
+        async with session.get(self._vt_url_endpoint(url), headers=headers) as response:
+            if response.status == 200:
+                return await response.text()
+            if response.status != 404:
+                return f"Error: VT HTTP {response.status}"
+        
+        VTapiEndpoint = "https://www.virustotal.com/api/v3/urls"
+        payload = f'url={url}'
+        async with session.post(VTapiEndpoint, headers=headers, data=payload) as response:
+            if response.status != 200:
+                return f"Error: VT HTTP {response.status}"
+            submission = await response.json(content_type=None, loads=orjson.loads)
         try:
-            VTurlID = response.json()["data"]["links"]["self"]
-            response = requests.request("GET", VTurlID, headers=headers)
-            return response.text
+            VTurlID = submission["data"]["links"]["self"]
         except KeyError:
             return "Error: Invalid response data from VirusTotal API"
+        async with session.get(VTurlID, headers=headers) as response:
+            if response.status != 200:
+                return f"Error: VT HTTP {response.status}"
+            return await response.text()
+
+    def cached_invoke(self, prompt):
+        """
+        Invoke the LLM and return its text, reusing earlier responses
+        for identical deterministic prompts
+        """
+        key = self.llm_cache.cache_key(self.llm.model_name, prompt, self.llm.temperature)
+        if key is not None:
+            cached = self.llm_cache.get(key)
+            if cached is not None:
+                return cached
+        
+        response = self.llm.invoke(prompt)
+        content = response.content if hasattr(response, 'content') else str(response)
+        
+        if key is not None:
+            self.llm_cache.set(key, content)
+        return content
 
     def analyze_domain(self, url):
-        vt_data = self.queryVirusTotal(url)
+        # The two lookups are independent; wait on the slower one rather than their sum
+        with ThreadPoolExecutor(2) as ex:
+            vt_fut = ex.submit(self.coalescer.run, ('virustotal', url), self.queryVirusTotal, url)
+            uh_fut = ex.submit(self.coalescer.run, ('urlhaus', url), self.queryUrlHause, url)
+            vt_data, urlhaus_data = vt_fut.result(), uh_fut.result()
         if vt_data.startswith("Error:"):
             return vt_data
-        urlhaus_data = self.queryUrlHause(url)
-
-        template = """
-        Analyze the following JSON data from two domain scan sources:
-        VirusTotal scan: {JSON_DATA_Virus_Total}
-        URLhaus scan: {JSON_DATA_URL_HOUSE}
 
-        Based on the analysis, generate a brief assessment following these rules:
-        1. Start with "Based on related databases, domain identified as [malicious/suspicious/secure]"
-        2. Use "malicious" if VirusTotal malicious count > 0 or URLhaus query_status is "ok"
-        3. Use "suspicious" if VirusTotal suspicious count > 0 or undetected count is high
-        4. Use "secure" if VirusTotal harmless count is high and malicious/suspicious counts are 0, and URLhaus query_status is "no_results"
-        5. Highlight the URL status as online/offline/unknown from URLhaus data
-        6. Check the blacklists key in URLhaus data and highlight if the domain is identified as a spammer domain, phishing domain, botnet C&C domain, compromised website, or not listed
-        7. Provide a short summary of up to 10 words
-        8. Add a brief description if needed, focusing on key findings
-
-        Output the assessment in a concise paragraph.
-        """
-        prompt = PromptTemplate(template=template, input_variables=["JSON_DATA_Virus_Total", "JSON_DATA_URL_HOUSE"])
-        chain = prompt | self.llm | RunnableLambda(lambda x: x.content)
-        return chain.invoke({"JSON_DATA_Virus_Total": vt_data, "JSON_DATA_URL_HOUSE": urlhaus_data})
+        return self._domain_chain.invoke({"JSON_DATA_Virus_Total": vt_data, "JSON_DATA_URL_HOUSE": urlhaus_data})
 
     def describe_image(self, image_path):
-        with Image.open(image_path) as img:
-            img = img.convert('RGB')
-            img_data = io.BytesIO()
-            img.save(img_data, format='JPEG')
-            img_data.seek(0)
-            image_data = base64.b64encode(img_data.read()).decode('utf-8')
+        image_bytes = self._prepare_image(image_path)
+        
+        # Identical screenshots reuse the earlier description instead of re-uploading
+        cache_key = self.llm_cache.cache_key(
+            "gpt-4o-vision", hashlib.sha256(image_bytes).hexdigest(), 0
+        )
+        cached = self.llm_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        image_data = base64.b64encode(image_bytes).decode('ascii')
 
-        model = ChatOpenAI(model="gpt-4o", openai_api_key=self.openai_api_key, temperature=0)
         IMAGE_DESCRIPTION_PROMPT = """
         Analyze the following image in detail:
 
@@ -426,6 +849,7 @@ Respond with just a number 0-100:"""
 
         Please be as thorough and precise as possible in your analysis, ensuring that all text is captured exactly as it appears in the image.
         """
+        from langchain_core.messages import HumanMessage
         message = HumanMessage(
             content=[
                 {"type": "text", "text": IMAGE_DESCRIPTION_PROMPT},
@@ -437,10 +861,28 @@ Respond with just a number 0-100:"""
                 },
             ],
         )
-        response = model.invoke([message])
+        response = self.vision_llm.invoke([message])
+        self.llm_cache.set(cache_key, response.content)
         return response.content
 
-    def agentic_analyze(self, user_input: str, input_type_hint: str = None, language: str = 'en'):
+    @staticmethod
+    def _prepare_image(image_path, max_edge=1024):
+        """Return JPEG data (bytes-like) with the long edge capped at max_edge pixels"""
+        with Image.open(image_path) as img:
+            # Small JPEGs are already upload-ready
+            if img.format == 'JPEG' and img.mode == 'RGB' and max(img.size) <= max_edge:
+                with open(image_path, 'rb') as f:
+                    return f.read()
+            
+            img = img.convert('RGB')
+            img.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+            img_data = io.BytesIO()
+            img.save(img_data, format='JPEG', quality=85, optimize=True, progressive=True)
+            # Hand out a view of the encoder's buffer instead of copying it
+            return img_data.getbuffer()
+
+    def agentic_analyze(self, user_input: str, input_type_hint: str = None, language: str = 'en',
+                        use_cache: bool = True):
         """
         NEW: Agentic analysis using orchestrator with multilingual support
         This is the main entry point for intelligent, reasoned analysis
@@ -449,7 +891,40 @@ Respond with just a number 0-100:"""
             user_input: The content to analyze
             input_type_hint: Optional hint about input type (voice, video, image_deepfake)
             language: Language for response ('en' or 'hi')
+            use_cache: When False, skip the lookup and refresh the cached result
         """
+        # Identical requests within the TTL return the earlier (deterministic) result
+        key = self._analysis_cache_key(user_input, input_type_hint, language)
+        if use_cache:
+            with self._analysis_lock:
+                cached = self._analysis_cache.get(key)
+            if cached is not None:
+                return copy.deepcopy(cached)
+        
+        result = self._agentic_analyze(user_input, input_type_hint, language)
+        
+        # Failures are not cached so the next attempt can recover
+        if 'error' not in result:
+            with self._analysis_lock:
+                self._analysis_cache[key] = copy.deepcopy(result)
+        return result
+    
+    @staticmethod
+    def _analysis_cache_key(user_input: str, input_type_hint: str, language: str) -> str:
+        """Content key for agentic_analyze; media is keyed on a hash of the whole file, not its path"""
+        digest = hashlib.blake2b(f"{input_type_hint}|{language}|".encode('utf-8'))
+        if input_type_hint in ('voice', 'video', 'image_deepfake') and os.path.isfile(user_input):
+            # Uploads land at a fresh temp path each time, so only the bytes identify them
+            with open(user_input, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(chunk)
+        else:
+            # Text differing only in whitespace (re-pasted URLs, wrapped messages) shares an entry
+            digest.update(' '.join(user_input.split()).encode('utf-8'))
+        return digest.hexdigest()
+    
+    def _agentic_analyze(self, user_input: str, input_type_hint: str = None, language: str = 'en'):
+        """Uncached body of agentic_analyze"""
         # Handle special input types
         if input_type_hint == 'voice':
             # user_input should be file path
@@ -562,116 +1037,17 @@ Respond with just a number 0-100:"""
     
     def _localize_deepfake_verdict(self, verdict: str, language: str) -> str:
         """Localize deepfake verdicts"""
-        if language != 'hi':
-            return verdict
-        
-        translations = {
-            'Likely Authentic': 'संभावित रूप से वास्तविक',
-            'Likely Manipulated': 'संभावित रूप से छेड़छाड़ की गई',
-            'Potentially Manipulated': 'संभावित रूप से छेड़छाड़ की गई',
-            'Uncertain': 'अनिश्चित',
-            'No faces detected': 'कोई चेहरा नहीं मिला'
-        }
-        
-        return translations.get(verdict, verdict)
+        return _localize_verdict(verdict, language)
     
     def _get_voice_recommendations(self, risk_level: str, language: str = 'en'):
         """Generate recommendations for voice scam analysis"""
-        if language == 'hi':
-            recs = {
-                'high': [
-                    "कोई भी व्यक्तिगत या वित्तीय जानकारी प्रदान न करें",
-                    "तुरंत कॉल काट दें",
-                    "नंबर को अपने फ़ोन कैरियर और FTC को रिपोर्ट करें",
-                    "नंबर को ब्लॉक करें"
-                ],
-                'medium': [
-                    "संवेदनशील जानकारी साझा न करें",
-                    "आधिकारिक चैनलों के माध्यम से कॉलर की पहचान सत्यापित करें",
-                    "दबाव की रणनीति का उपयोग किए जाने पर कॉल समाप्त करें",
-                    "कॉल विवरण दस्तावेज़ करें"
-                ],
-                'low': [
-                    "अनिश्चित होने पर कॉलर की पहचान सत्यापित करें",
-                    "अनुरोधों की पुष्टि के लिए आधिकारिक संपर्क विधियों का उपयोग करें",
-                    "अपनी प्रवृत्ति पर भरोसा करें"
-                ],
-                'minimal': [
-                    "विश्लेषण के आधार पर कॉल वैध प्रतीत होती है",
-                    "मानक सावधानी अभी भी सलाह दी जाती है",
-                    "किसी भी असामान्य अनुरोध को स्वतंत्र रूप से सत्यापित करें"
-                ]
-            }
-        else:
-            recs = {
-                'high': [
-                    "Do not provide any personal or financial information",
-                    "Hang up immediately",
-                    "Report the number to your phone carrier and FTC",
-                    "Block the number"
-                ],
-                'medium': [
-                    "Do not share sensitive information",
-                    "Verify caller identity through official channels",
-                    "End the call if pressure tactics are used",
-                    "Document the call details"
-                ],
-                'low': [
-                    "Verify caller identity if unsure",
-                    "Use official contact methods to confirm requests",
-                    "Trust your instincts"
-                ],
-                'minimal': [
-                    "Call appears legitimate based on analysis",
-                    "Standard caution still advised",
-                    "Verify any unusual requests independently"
-                ]
-            }
-        return recs.get(risk_level, recs['medium'])
+        recs = _VOICE_RECS_HI if language == 'hi' else _VOICE_RECS_EN
+        return list(recs.get(risk_level, recs['medium']))
     
     def _get_deepfake_recommendations(self, risk_level: str, language: str = 'en'):
         """Generate recommendations for deepfake analysis"""
-        if language == 'hi':
-            recs = {
-                'high': [
-                    "मीडिया में हेरफेर के संकेत दिखाई देते हैं",
-                    "स्वतंत्र चैनलों के माध्यम से स्रोत सत्यापित करें",
-                    "सत्यापन के बिना साझा या प्रवर्धित न करें",
-                    "पेशेवर फोरेंसिक विश्लेषण पर विचार करें"
-                ],
-                'medium': [
-                    "विश्लेषण अनिर्णायक - सावधानी बरतें",
-                    "सामग्री पर भरोसा करने से पहले प्रामाणिकता सत्यापित करें",
-                    "पुष्टि करने वाले स्रोतों की तलाश करें",
-                    "संदर्भ और स्रोत विश्वसनीयता पर विचार करें"
-                ],
-                'minimal': [
-                    "विश्लेषण के आधार पर मीडिया प्रामाणिक प्रतीत होता है",
-                    "मानक सत्यापन प्रथाएं अभी भी लागू होती हैं",
-                    "हेरफेर की संभावनाओं के प्रति जागरूक रहें"
-                ]
-            }
-        else:
-            recs = {
-                'high': [
-                    "Media shows signs of manipulation",
-                    "Verify source through independent channels",
-                    "Do not share or amplify without verification",
-                    "Consider professional forensic analysis"
-                ],
-                'medium': [
-                    "Analysis inconclusive - exercise caution",
-                    "Verify authenticity before trusting content",
-                    "Look for corroborating sources",
-                    "Consider context and source credibility"
-                ],
-                'minimal': [
-                    "Media appears authentic based on analysis",
-                    "Standard verification practices still apply",
-                    "Remain aware of manipulation possibilities"
-                ]
-            }
-        return recs.get(risk_level, recs['medium'])
+        recs = _DEEPFAKE_RECS_HI if language == 'hi' else _DEEPFAKE_RECS_EN
+        return list(recs.get(risk_level, recs['medium']))
     
     def get_threat_news(self, days_back: int = 7, max_results: int = 20):
         """
@@ -692,35 +1068,9 @@ Respond with just a number 0-100:"""
                 'summary': {}
             }
     
-    def _get_voice_recommendations(self, risk_level: str):
-        """Generate recommendations for voice scam analysis"""
-        recs = {
-            'high': [
-                "Do not provide any personal or financial information",
-                "Hang up immediately",
-                "Report the number to your phone carrier and FTC",
-                "Block the number"
-            ],
-            'medium': [
-                "Do not share sensitive information",
-                "Verify caller identity through official channels",
-                "End the call if pressure tactics are used",
-                "Document the call details"
-            ],
-            'low': [
-                "Verify caller identity if unsure",
-                "Use official contact methods to confirm requests",
-                "Trust your instincts"
-            ],
-            'minimal': [
-                "Call appears legitimate based on analysis",
-                "Standard caution still advised",
-                "Verify any unusual requests independently"
-            ]
-        }
-        return recs.get(risk_level, recs['medium'])
-
     def setup_agent(self):
+        from langchain.agents import initialize_agent, AgentType
+        from langchain.tools import Tool
         tools = [
             Tool(
                 name="Domain Analyzer",
@@ -739,90 +1089,177 @@ Respond with just a number 0-100:"""
             )
         ]
         self.agent = initialize_agent(tools, self.llm, agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION, verbose=True)
+        # Tool set is fixed once the agent is built; rebuilt together with it
+        self._tool_names = frozenset(tool.name for tool in self.agent.tools)
 
     def analyze_phone(self, phone_number):
 
         phoneNumberVariants = generate_phone_number_variants(phone_number)
         searchData = checkPhoneLogic(phoneNumberVariants)
 
-        template = """{Search_Data_Brave} \n\nPlease answer the user's question using only information from the search results. Include links to the relevant search result URLs within your answer. Keep your answer concise.
-
-        User's question: Can you identify whether telephone number variants contains in this list {Phone_Number_Variants} is used for scams, phishing, or other suspicious activities? Highlight if the number is unsafe or write that there needs to be more information or if negative reviews and comments were not recorded in the first ten search results sites. 
-
-        Assistant:
-        """
-        prompt = PromptTemplate(template=template, input_variables=["Search_Data_Brave", "Phone_Number_Variants"])
-        chain = prompt | self.llm | RunnableLambda(lambda x: x.content)
-        return chain.invoke({"Search_Data_Brave": searchData, "Phone_Number_Variants": phoneNumberVariants})
+        return self._phone_chain.invoke({"Search_Data_Brave": searchData, "Phone_Number_Variants": phoneNumberVariants})
     
     
 
     def analyze_message(self, message):
-        template = """
-        Analyze the following message for potential phishing attempts:
-        Message: {message}
+        # Repeated messages are answered from the LLM response cache
+        return self._message_chain.invoke({"message": message})
 
-        Provide your analysis, highlighting any suspicious elements:
-        If message contains domain or email than also call Domain Analyzer tool, if contains phone number than call Phone Number Analyzer Tool
+    def stream_message_analysis(self, message):
+        """
+        Yield the message analysis as it is generated
+        A cached analysis is yielded in one piece; a fresh one is cached once complete
+        """
+        prompt_value = self._message_prompt.invoke({"message": message})
+        key = self.llm_cache.cache_key(self.llm.model_name, prompt_value, self.llm.temperature)
+        cached = self.llm_cache.get(key) if key is not None else None
+        if cached is not None:
+            yield cached
+            return
+        
+        parts = []
+        for chunk in self.llm.stream(prompt_value):
+            parts.append(chunk.content)
+            yield chunk.content
+        
+        if key is not None:
+            self.llm_cache.set(key, "".join(parts))
+
+    def _submit_indicators(self, executor, text, seen, budget):
         """
-        prompt = PromptTemplate(template=template, input_variables=["message"])
-        chain = prompt | self.llm | RunnableLambda(lambda x: x.content)
-        return chain.invoke({"message": message})
+        Start lookups for up to budget domains/phones in text that were not
+        analyzed yet; returns (label, future) pairs
+        """
+        submitted = []
+        for match in _EXTRACTORS_RE.finditer(text):
+            if len(submitted) >= budget:
+                break
+            kind = match.lastgroup
+            value = match.group('email_domain') if kind == 'email' else match.group(kind)
+            if value in seen:
+                continue
+            seen.add(value)
+            if kind == 'phone':
+                submitted.append((f"Phone analysis ({value})", executor.submit(self.analyze_phone, value)))
+            else:
+                submitted.append((f"Domain analysis ({value})", executor.submit(self.analyze_domain, value)))
+        return submitted
 
     def run(self):
+        # Piped input (e.g. `python agent.py < urls.txt`) is processed as a pipelined batch
+        if not sys.stdin.isatty():
+            return self.run_batch()
+        
         while True:
             user_input = input("Hi, this is an AI Agent Brama, who can help you check the security metrics and safety of the following resources: \nText messages, Site URL, Email, Phone number, and SMS. You can also use the educational mode to learn more about social engineering and cybersecurity threats, such as scams and phishing.\n\nEnter a URL, message, or write 'img', 'screenshot', or 'image' to attach an image, or 'education_mode' or 'quit' to exit: ")
-            if user_input.lower() == 'quit':
+            # Only short inputs can be commands; skip lowercasing large pastes
+            cmd = user_input.lower() if len(user_input) <= _MAX_COMMAND_LEN else None
+            if cmd == 'quit':
                 break
 
             # Check if user wants to attach a text file
-            if user_input.lower() == 'file':
+            if cmd == 'file':
                 file_path = input("Enter the path to the text file: ")
                 with open(file_path, 'r') as file:
                     user_input = file.read()
 
-            elif user_input.lower() == 'education_mode':
+            elif cmd == 'education_mode':
+                # Pulls in the PDF loader and vector store; only load it when asked for
+                from educationalModuleRAG import educational_mode
                 educational_mode()
                 continue
 
-            # Extract domain from email address in user input
-            email_match = re.search(r'\b[A-Za-z0-9._%+-]+@([A-Za-z0-9.-]+\.[A-Z|a-z]{2,})\b', user_input)
-            if email_match:
-                domain = email_match.group(1)
-                domain_analysis = self.analyze_domain(domain)
-                dmarc_analysis = checkDMARC(domain)
-                user_input += f"\n\nDMARC analysis: {dmarc_analysis}"
-            
-            # Extract domain from user input
-            domain_match = re.search(r'([A-Za-z0-9.-]+\.[A-Z|a-z]{2,})', user_input)
-            if domain_match:
-                domain = domain_match.group(1)
-                if 'Domain Analyzer' in [tool.name for tool in self.agent.tools]:
-                    domain_analysis = self.agent.run(f"Analyze the domain: {domain}")
-                    user_input += f"\n\nDomain analysis: {domain_analysis}"
-
-            # Extract phone number from user input
-            phone_match = re.search(r'\+?\d[\d -]{8,15}\d', user_input)
+            # Tool results are collected and joined onto the input once
+            augments = []
+
+            # Harvest the first email, domain and phone number in one pass
+            found = {}
+            for match in _EXTRACTORS_RE.finditer(user_input):
+                kind = match.lastgroup
+                if kind == 'email':
+                    found.setdefault('email_domain', match.group('email_domain'))
+                found.setdefault(kind, match.group(kind))
+
+            # DMARC check for the sender's domain
+            if 'email_domain' in found:
+                dmarc_analysis = checkDMARC(found['email_domain'])
+                augments.append(f"DMARC analysis: {dmarc_analysis}")
             
-            if phone_match:
-                phone_number = phone_match.group(0)
-                phone_analysis = self.analyze_phone(phone_number)
-                user_input += f"\n\nPhone analysis: {phone_analysis}"
+            # Domain analysis (a bare domain, otherwise the email's domain)
+            domain = found.get('domain') or found.get('email_domain')
+            if domain and 'Domain Analyzer' in self._tool_names:
+                domain_analysis = self.agent.run(f"Analyze the domain: {domain}")
+                augments.append(f"Domain analysis: {domain_analysis}")
+
+            # Phone number analysis
+            if 'phone' in found:
+                phone_analysis = self.analyze_phone(found['phone'])
+                augments.append(f"Phone analysis: {phone_analysis}")
 
             # Check if user wants to attach a screenshot
-            if 'img' in user_input.lower() or 'screenshot' in user_input.lower() or 'image' in user_input.lower():
+            if _IMAGE_KEYWORDS_RE.search(user_input):
                 image_path = input("Enter the path to the image: ")
                 image_analysis = self.describe_image(image_path)
-                user_input += f"\n\nImage analysis: {image_analysis}"
+                augments.append(f"Image analysis: {image_analysis}")
 
-            response = self.agent.run(user_input)
+            final_input = user_input + ("\n\n" + "\n\n".join(augments) if augments else "")
+            response = self.agent.run(final_input)
             
 
-            # Analyze message content
-            message_analysis = self.analyze_message(response)
-            print(f"Message analysis: {message_analysis}")
+            # Stream the message analysis; indicators it mentions are looked up
+            # line by line while the rest of the answer is still being generated
+            print("Message analysis: ", end="", flush=True)
+            seen = set(found.values())
+            followups = []
+            max_followups = 3
+            pending = ""
+            with ThreadPoolExecutor(max_workers=3) as ex:
+                for chunk in self.stream_message_analysis(response):
+                    print(chunk, end="", flush=True)
+                    pending += chunk
+                    line_end = pending.rfind("\n")
+                    if line_end >= 0:
+                        followups += self._submit_indicators(ex, pending[:line_end], seen, max_followups - len(followups))
+                        pending = pending[line_end + 1:]
+                followups += self._submit_indicators(ex, pending, seen, max_followups - len(followups))
+                print()
+                for label, future in followups:
+                    print(f"{label}: {future.result()}")
+
+    def run_batch(self, workers: int = 4):
+        """
+        Non-interactive mode: analyze one input per stdin line, keeping up to
+        `workers` analyses in flight; results are printed as JSON lines as they complete
+        """
+        asyncio.run(self._run_batch(workers))
+
+    async def _run_batch(self, workers: int):
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=workers * 2)
+
+        async def produce():
+            while True:
+                line = await loop.run_in_executor(None, sys.stdin.readline)
+                if not line:
+                    break
+                line = line.strip()
+                if line:
+                    await queue.put(line)
+            for _ in range(workers):
+                await queue.put(None)
+
+        async def consume():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                result = await asyncio.to_thread(self.agentic_analyze, item)
+                print(orjson.dumps({'input': item, **result}).decode(), flush=True)
+
+        await asyncio.gather(produce(), *(consume() for _ in range(workers)))
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, handlers=[logging.StreamHandler()])
     try:
         agent = CybersecurityAgent()
         agent.run()
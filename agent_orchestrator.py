@@ -3,11 +3,30 @@ Agent Orchestrator - Central Intelligence Layer
 Coordinates tool selection, API calls, and reasoning
 """
 
-import re
-import json
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
-from enum import Enum
+import logging
+import numpy as np
+from typing import Dict, List, Any, Optional, Callable, Tuple
+from dataclasses import dataclass, field
+from enum import Enum, IntEnum
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+
+from risk_scoring import RISK_LEVELS, risk_level_id, weighted_score
+
+# RE2 matches in linear time (no backtracking blow-up on adversarial pastes); stdlib re is the fallback
+try:
+    import re2 as re_engine
+except ImportError:
+    import re as re_engine
+
+logger = logging.getLogger(__name__)
+
+# Input classification in one scan; at each position email is tried before url before phone
+_INPUT_TYPE_RE = re_engine.compile(
+    r'(?i)(?P<email>\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[a-zA-Z]{2,}\b)'
+    r'|(?P<url>https?://|\b[a-z0-9-]+\.[a-z]{2,}\b)'
+    r'|(?P<phone>\+?\d[\d\s\-\(\)]{8,}\d)'
+)
 
 class InputType(Enum):
     URL = "url"
@@ -19,6 +38,42 @@ class InputType(Enum):
     VIDEO = "video"
     UNKNOWN = "unknown"
 
+@lru_cache(maxsize=2048)
+def _classify(user_input: str) -> InputType:
+    """Pure input classification, memoized for repeated inputs"""
+    # Precedence: email > url > phone, whatever order they appear in
+    found = set()
+    for match in _INPUT_TYPE_RE.finditer(user_input):
+        if match.lastgroup == 'email':
+            return InputType.EMAIL
+        found.add(match.lastgroup)
+    
+    if 'url' in found:
+        return InputType.URL
+    if 'phone' in found:
+        return InputType.PHONE
+    
+    # Default to message
+    return InputType.MESSAGE
+
+class SignalSource(IntEnum):
+    """Known signal sources; values index the orchestrator's weight vector"""
+    VIRUSTOTAL = 0
+    URLHAUS = 1
+    ABUSEIPDB = 2
+    URLSCAN = 3
+    SERPER = 4
+    DMARC = 5
+    PHONE_SEARCH = 6
+    VOICE_ANALYSIS = 7
+    LLM_ANALYSIS = 8
+    OTHER = 9
+
+@lru_cache(maxsize=64)
+def source_from_name(name: str) -> SignalSource:
+    """Map a tool or display name ('Phone Search', 'phone_search') to its SignalSource"""
+    return SignalSource.__members__.get(name.strip().upper().replace(' ', '_'), SignalSource.OTHER)
+
 @dataclass
 class ThreatSignal:
     """Represents a single threat signal from an API/tool"""
@@ -27,6 +82,10 @@ class ThreatSignal:
     confidence: float  # 0-100
     evidence: str
     raw_data: Optional[Dict] = None
+    source_id: SignalSource = field(init=False, repr=False)
+    
+    def __post_init__(self):
+        self.source_id = source_from_name(self.source)
 
 @dataclass
 class AnalysisResult:
@@ -39,7 +98,60 @@ class AnalysisResult:
     signals: List[ThreatSignal]
     recommendations: List[str]
     uncertainty_notes: List[str]
-    raw_input: str
+    raw_input_full: str = field(repr=False)
+    raw_input_preview_len: int = 200
+
+    @property
+    def raw_input(self) -> str:
+        """Truncated input preview, sliced only when read"""
+        return self.raw_input_full[:self.raw_input_preview_len]
+
+# Base recommendations per risk level (shared tuples; callers get list copies)
+_REC_EN = {
+    'high': (
+        "Do not interact with this content",
+        "Report to your security team immediately",
+        "Block the source if possible"
+    ),
+    'medium': (
+        "Proceed with extreme caution",
+        "Verify through independent channels",
+        "Do not provide sensitive information"
+    ),
+    'low': (
+        "Exercise standard security practices",
+        "Verify sender identity if unsure",
+        "Monitor for additional suspicious activity"
+    ),
+    'minimal': (
+        "Content appears legitimate based on available data",
+        "Maintain general security awareness",
+        "Report if behavior changes"
+    )
+}
+
+_REC_HI = {
+    'high': (
+        "इस सामग्री के साथ इंटरैक्ट न करें",
+        "तुरंत अपनी सुरक्षा टीम को रिपोर्ट करें",
+        "यदि संभव हो तो स्रोत को ब्लॉक करें"
+    ),
+    'medium': (
+        "अत्यधिक सावधानी के साथ आगे बढ़ें",
+        "स्वतंत्र चैनलों के माध्यम से सत्यापित करें",
+        "संवेदनशील जानकारी प्रदान न करें"
+    ),
+    'low': (
+        "मानक सुरक्षा प्रथाओं का पालन करें",
+        "अनिश्चित होने पर प्रेषक की पहचान सत्यापित करें",
+        "अतिरिक्त संदिग्ध गतिविधि की निगरानी करें"
+    ),
+    'minimal': (
+        "उपलब्ध डेटा के आधार पर सामग्री वैध प्रतीत होती है",
+        "सामान्य सुरक्षा जागरूकता बनाए रखें",
+        "व्यवहार बदलने पर रिपोर्ट करें"
+    )
+}
 
 class AgentOrchestrator:
     """
@@ -50,14 +162,85 @@ class AgentOrchestrator:
     4. Produces reasoned verdicts
     """
     
-    def __init__(self, llm, tools_dict):
+    # Tools to run per input type, in execution order
+    _TOOL_MAP: Dict[InputType, Tuple[str, ...]] = {
+        InputType.URL: ('virustotal', 'urlhaus', 'urlscan', 'llm_analysis', 'news_correlation'),
+        InputType.EMAIL: ('virustotal', 'dmarc', 'llm_analysis', 'news_correlation'),
+        InputType.PHONE: ('phone_search', 'llm_analysis'),
+        InputType.MESSAGE: ('llm_analysis', 'serper', 'news_correlation'),
+        InputType.IMAGE: ('image_ocr', 'deepfake_detection', 'llm_analysis'),
+        InputType.VOICE: ('voice_analysis', 'llm_analysis'),
+        InputType.VIDEO: ('deepfake_detection', 'llm_analysis')
+    }
+
+    # Static instructions go in the system message and stay byte-identical across
+    # calls, so provider-side prompt caching can reuse the prefix; only the
+    # assessment data varies, and it comes last in the user message.
+    _SUMMARY_SYSTEM = {
+        'en': """You are a professional cybersecurity analyst.
+Analyze the security assessment you are given and provide a brief, professional summary.
+
+Provide a 2-3 sentence summary that:
+1. States the verdict clearly
+2. Explains the key reasoning
+3. Maintains professional, analytical tone (no alarmism)""",
+        'hi': """आप एक पेशेवर साइबर सुरक्षा विश्लेषक हैं। 
+आपको हिंदी में स्पष्ट, तकनीकी और तटस्थ भाषा में जवाब देना है।
+अनौपचारिक भाषा या स्लैंग का उपयोग न करें।
+साइबर सुरक्षा तर्क को स्पष्ट रूप से समझाएं।
+
+इस सुरक्षा मूल्यांकन का विश्लेषण करें और एक संक्षिप्त, पेशेवर सारांश प्रदान करें।
+
+2-3 वाक्यों में एक सारांश प्रदान करें जो:
+1. निर्णय को स्पष्ट रूप से बताता है
+2. मुख्य तर्क की व्याख्या करता है
+3. पेशेवर, विश्लेषणात्मक स्वर बनाए रखता है (कोई अलार्मवाद नहीं)"""
+    }
+
+    _SUMMARY_TEMPLATES = {
+        'en': """Input type: {input_type}
+Risk level: {risk_level}
+Risk score: {risk_score}/100
+Confidence: {confidence}%
+
+Signals detected:
+{signal_summary}
+
+Summary:""",
+        'hi': """इनपुट प्रकार: {input_type}
+जोखिम स्तर: {risk_level}
+जोखिम स्कोर: {risk_score}/100
+विश्वसनीयता: {confidence}%
+
+पहचाने गए संकेत:
+{signal_summary}
+
+सारांश:"""
+    }
+    
+    def __init__(self, llm, tools_dict,
+                 tool_runner: Optional[Callable[[List[str], str], List[ThreatSignal]]] = None,
+                 llm_invoke: Optional[Callable[[Any], str]] = None):
         """
         Args:
             llm: Language model for reasoning
             tools_dict: Dictionary of available tools/analyzers
+            tool_runner: Optional callable(tool_names, user_input) that executes
+                         the selected tools and returns their signals. Defaults
+                         to invoking each tool in turn.
+            llm_invoke: Optional callable(prompt) returning the completion text,
+                        e.g. a caching wrapper around llm. Defaults to llm.invoke.
         """
         self.llm = llm
         self.tools = tools_dict
+        self.tool_runner = tool_runner
+        # The tool set is fixed, so filter the map down to available tools once
+        self._resolved_tool_map = {
+            input_type: tuple(tool for tool in tools if tool in tools_dict)
+            for input_type, tools in self._TOOL_MAP.items()
+        }
+        self._default_tools = ('llm_analysis',) if 'llm_analysis' in tools_dict else ()
+        self.llm_invoke = llm_invoke
         
         # Threat scoring weights
         self.weights = {
@@ -71,47 +254,49 @@ class AgentOrchestrator:
             'voice_analysis': 0.40,
             'llm_analysis': 0.05
         }
+        # Same weights indexed by SignalSource; unknown sources get 0.05
+        self._weights_arr = np.array(
+            [self.weights.get(source.name.lower(), 0.05) for source in SignalSource], dtype=np.float64
+        )
         
     def identify_input_type(self, user_input: str) -> InputType:
         """
         Intelligently identify what type of input this is
         """
-        input_lower = user_input.lower().strip()
-        
-        # URL patterns
-        if re.search(r'https?://', input_lower) or re.search(r'\b[a-z0-9-]+\.[a-z]{2,}\b', input_lower):
-            return InputType.URL
-        
-        # Email patterns
-        if re.search(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', user_input):
-            return InputType.EMAIL
-        
-        # Phone patterns
-        if re.search(r'\+?\d[\d\s\-\(\)]{8,}\d', user_input):
-            return InputType.PHONE
-        
-        # Default to message
-        return InputType.MESSAGE
+        return _classify(user_input)
     
-    def select_tools(self, input_type: InputType, input_text: str) -> List[str]:
+    def select_tools(self, input_type: InputType, input_text: str) -> Tuple[str, ...]:
         """
         Decide which tools to use based on input type
         Returns list of tool names to invoke
         """
-        tool_map = {
-            InputType.URL: ['virustotal', 'urlhaus', 'urlscan', 'llm_analysis', 'news_correlation'],
-            InputType.EMAIL: ['virustotal', 'dmarc', 'llm_analysis', 'news_correlation'],
-            InputType.PHONE: ['phone_search', 'llm_analysis'],
-            InputType.MESSAGE: ['llm_analysis', 'serper', 'news_correlation'],
-            InputType.IMAGE: ['image_ocr', 'deepfake_detection', 'llm_analysis'],
-            InputType.VOICE: ['voice_analysis', 'llm_analysis'],
-            InputType.VIDEO: ['deepfake_detection', 'llm_analysis']
-        }
+        return self._resolved_tool_map.get(input_type, self._default_tools)
+    
+    def execute_tools(self, tool_names: List[str], user_input: str) -> List[ThreatSignal]:
+        """
+        Run the selected tools and collect the signals they produce
+        """
+        if self.tool_runner:
+            return self.tool_runner(tool_names, user_input)
+        
+        if not tool_names:
+            return []
         
-        selected = tool_map.get(input_type, ['llm_analysis'])
+        # Tools are independent network calls: run them side by side, keep selection order
+        with ThreadPoolExecutor(max_workers=len(tool_names)) as ex:
+            results = list(ex.map(lambda name: self._safe_invoke(name, user_input), tool_names))
         
-        # Filter to only available tools
-        return [tool for tool in selected if tool in self.tools]
+        return [signal for signal in results if signal]
+    
+    def _safe_invoke(self, tool_name: str, user_input: str) -> Optional[ThreatSignal]:
+        """Invoke one tool, logging failures instead of failing the whole analysis"""
+        try:
+            tool = self.tools.get(tool_name)
+            if tool:
+                return tool(user_input)
+        except Exception:
+            logger.exception("Tool %s failed", tool_name)
+        return None
     
     def calculate_weighted_risk(self, signals: List[ThreatSignal]) -> Dict[str, Any]:
         """
@@ -126,30 +311,16 @@ class AgentOrchestrator:
                 'reasoning': ['No threat signals detected']
             }
         
-        # Calculate weighted score
-        total_weight = 0
-        weighted_sum = 0
-        confidence_sum = 0
-        
-        for signal in signals:
-            weight = self.weights.get(signal.source.lower(), 0.05)
-            weighted_sum += signal.score * weight * (signal.confidence / 100)
-            total_weight += weight
-            confidence_sum += signal.confidence
+        # Calculate weighted score over column vectors of the signal fields
+        n = len(signals)
+        scores = np.fromiter((s.score for s in signals), dtype=np.float64, count=n)
+        confidences = np.fromiter((s.confidence for s in signals), dtype=np.float64, count=n)
+        weights = self._weights_arr[np.fromiter((s.source_id for s in signals), dtype=np.intp, count=n)]
         
-        # Normalize
-        risk_score = (weighted_sum / total_weight) if total_weight > 0 else 0
-        avg_confidence = confidence_sum / len(signals) if signals else 0
-        
-        # Determine risk level with nuance
-        if risk_score >= 75:
-            risk_level = 'high'
-        elif risk_score >= 50:
-            risk_level = 'medium'
-        elif risk_score >= 25:
-            risk_level = 'low'
-        else:
-            risk_level = 'minimal'
+        # Normalize and bucket in the compiled kernels
+        risk_score = float(weighted_score(scores, confidences, weights))
+        avg_confidence = float(confidences.mean())
+        risk_level = RISK_LEVELS[risk_level_id(risk_score)]
         
         # Generate reasoning
         reasoning = self._generate_risk_reasoning(signals, risk_score)
@@ -167,27 +338,28 @@ class AgentOrchestrator:
         """
         reasoning = []
         
-        # Group signals by score
-        high_risk_signals = [s for s in signals if s.score >= 70]
-        medium_risk_signals = [s for s in signals if 40 <= s.score < 70]
-        low_risk_signals = [s for s in signals if s.score < 40]
+        # Group sources by score and track the score spread in one pass
+        high, medium, low = [], [], []
+        min_score = max_score = signals[0].score if signals else 0
+        for s in signals:
+            (high if s.score >= 70 else medium if s.score >= 40 else low).append(s.source)
+            if s.score < min_score:
+                min_score = s.score
+            elif s.score > max_score:
+                max_score = s.score
         
-        if high_risk_signals:
-            sources = ', '.join([s.source for s in high_risk_signals])
-            reasoning.append(f"Strong threat indicators from {sources}")
+        if high:
+            reasoning.append(f"Strong threat indicators from {', '.join(high)}")
         
-        if medium_risk_signals:
-            sources = ', '.join([s.source for s in medium_risk_signals])
-            reasoning.append(f"Moderate concerns flagged by {sources}")
+        if medium:
+            reasoning.append(f"Moderate concerns flagged by {', '.join(medium)}")
         
-        if low_risk_signals:
-            sources = ', '.join([s.source for s in low_risk_signals])
-            reasoning.append(f"Minimal indicators from {sources}")
+        if low:
+            reasoning.append(f"Minimal indicators from {', '.join(low)}")
         
         # Check for signal agreement
         if len(signals) >= 2:
-            scores = [s.score for s in signals]
-            score_variance = max(scores) - min(scores)
+            score_variance = max_score - min_score
             
             if score_variance < 20:
                 reasoning.append("Multiple sources show consistent assessment")
@@ -202,54 +374,8 @@ class AgentOrchestrator:
         Generate actionable recommendations based on risk and context
         Language-aware recommendations
         """
-        if language == 'hi':
-            base_recommendations = {
-                'high': [
-                    "इस सामग्री के साथ इंटरैक्ट न करें",
-                    "तुरंत अपनी सुरक्षा टीम को रिपोर्ट करें",
-                    "यदि संभव हो तो स्रोत को ब्लॉक करें"
-                ],
-                'medium': [
-                    "अत्यधिक सावधानी के साथ आगे बढ़ें",
-                    "स्वतंत्र चैनलों के माध्यम से सत्यापित करें",
-                    "संवेदनशील जानकारी प्रदान न करें"
-                ],
-                'low': [
-                    "मानक सुरक्षा प्रथाओं का पालन करें",
-                    "अनिश्चित होने पर प्रेषक की पहचान सत्यापित करें",
-                    "अतिरिक्त संदिग्ध गतिविधि की निगरानी करें"
-                ],
-                'minimal': [
-                    "उपलब्ध डेटा के आधार पर सामग्री वैध प्रतीत होती है",
-                    "सामान्य सुरक्षा जागरूकता बनाए रखें",
-                    "व्यवहार बदलने पर रिपोर्ट करें"
-                ]
-            }
-        else:
-            base_recommendations = {
-                'high': [
-                    "Do not interact with this content",
-                    "Report to your security team immediately",
-                    "Block the source if possible"
-                ],
-                'medium': [
-                    "Proceed with extreme caution",
-                    "Verify through independent channels",
-                    "Do not provide sensitive information"
-                ],
-                'low': [
-                    "Exercise standard security practices",
-                    "Verify sender identity if unsure",
-                    "Monitor for additional suspicious activity"
-                ],
-                'minimal': [
-                    "Content appears legitimate based on available data",
-                    "Maintain general security awareness",
-                    "Report if behavior changes"
-                ]
-            }
-        
-        recommendations = base_recommendations.get(risk_level, [])
+        base = _REC_HI if language == 'hi' else _REC_EN
+        recommendations = list(base.get(risk_level, ()))
         
         # Add context-specific recommendations (language-aware)
         if input_type == InputType.PHONE:
@@ -317,17 +443,7 @@ class AgentOrchestrator:
         selected_tools = self.select_tools(input_type, user_input)
         
         # Step 3: Execute tools and collect signals
-        signals = []
-        for tool_name in selected_tools:
-            try:
-                tool = self.tools.get(tool_name)
-                if tool:
-                    signal = tool(user_input)
-                    if signal:
-                        signals.append(signal)
-            except Exception as e:
-                # Log but don't fail entire analysis
-                print(f"Tool {tool_name} failed: {e}")
+        signals = self.execute_tools(selected_tools, user_input)
         
         # Step 4: Calculate weighted risk
         risk_assessment = self.calculate_weighted_risk(signals)
@@ -361,7 +477,7 @@ class AgentOrchestrator:
             signals=signals,
             recommendations=recommendations,
             uncertainty_notes=uncertainties,
-            raw_input=user_input[:200]  # Truncate for safety
+            raw_input_full=user_input  # Preview truncated on access
         )
     
     def _generate_summary(self, user_input: str, input_type: InputType,
@@ -377,50 +493,20 @@ class AgentOrchestrator:
                 for s in signals
             ])
             
-            # Language-specific system prompt
-            if language == 'hi':
-                system_prompt = """आप एक पेशेवर साइबर सुरक्षा विश्लेषक हैं। 
-आपको हिंदी में स्पष्ट, तकनीकी और तटस्थ भाषा में जवाब देना है।
-अनौपचारिक भाषा या स्लैंग का उपयोग न करें।
-साइबर सुरक्षा तर्क को स्पष्ट रूप से समझाएं।"""
-                
-                prompt = f"""{system_prompt}
-
-इस सुरक्षा मूल्यांकन का विश्लेषण करें और एक संक्षिप्त, पेशेवर सारांश प्रदान करें।
-
-इनपुट प्रकार: {input_type.value}
-जोखिम स्तर: {risk_assessment['risk_level']}
-जोखिम स्कोर: {risk_assessment['risk_score']}/100
-विश्वसनीयता: {risk_assessment['confidence']}%
-
-पहचाने गए संकेत:
-{signal_summary}
-
-2-3 वाक्यों में एक सारांश प्रदान करें जो:
-1. निर्णय को स्पष्ट रूप से बताता है
-2. मुख्य तर्क की व्याख्या करता है
-3. पेशेवर, विश्लेषणात्मक स्वर बनाए रखता है (कोई अलार्मवाद नहीं)
-
-सारांश:"""
-            else:
-                prompt = f"""Analyze this security assessment and provide a brief, professional summary.
-
-Input type: {input_type.value}
-Risk level: {risk_assessment['risk_level']}
-Risk score: {risk_assessment['risk_score']}/100
-Confidence: {risk_assessment['confidence']}%
-
-Signals detected:
-{signal_summary}
-
-Provide a 2-3 sentence summary that:
-1. States the verdict clearly
-2. Explains the key reasoning
-3. Maintains professional, analytical tone (no alarmism)
-
-Summary:"""
+            if language not in self._SUMMARY_TEMPLATES:
+                language = 'en'
+            user_block = self._SUMMARY_TEMPLATES[language].format(
+                input_type=input_type.value,
+                risk_level=risk_assessment['risk_level'],
+                risk_score=risk_assessment['risk_score'],
+                confidence=risk_assessment['confidence'],
+                signal_summary=signal_summary
+            )
+            messages = [('system', self._SUMMARY_SYSTEM[language]), ('human', user_block)]
 
-            response = self.llm.invoke(prompt)
+            if self.llm_invoke is not None:
+                return self.llm_invoke(messages)
+            response = self.llm.invoke(messages)
             return response.content if hasattr(response, 'content') else str(response)
             
         except Exception as e:
@@ -4,33 +4,180 @@ Enterprise threat intelligence API
 """
 
 from flask import Flask, request, jsonify, send_from_directory
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
 from dotenv import load_dotenv
 import os
 import base64
+import decimal
+import tempfile
+import threading
+from functools import lru_cache
+from types import MappingProxyType
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 from io import BytesIO
-from PIL import Image
+import orjson
+
+try:
+    from flask_compress import Compress
+except ImportError:
+    Compress = None
 
 # Load environment variables
 load_dotenv()
 
-# Import agent
-from agent import CybersecurityAgent
 from services.twilio_client import TwilioService
 
+class ORJSONProvider(JSONProvider):
+    """Flask JSON provider backed by orjson (also used by jsonify and request.get_json)"""
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    @staticmethod
+    def _default(obj):
+        if isinstance(obj, (set, frozenset)):
+            return list(obj)
+        if isinstance(obj, decimal.Decimal):
+            return str(obj)
+        if hasattr(obj, '__html__'):
+            return str(obj.__html__())
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self._default, option=self.options).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=self._default, option=self.options),
+            mimetype='application/json'
+        )
+
 app = Flask(__name__, static_folder='frontend', static_url_path='')
+app.json = ORJSONProvider(app)
+# Reject oversized uploads from Content-Length before the body is read
+app.config['MAX_CONTENT_LENGTH'] = 200 * 1024 * 1024
 CORS(app)
 
-# Initialize agent
-try:
-    agent = CybersecurityAgent()
-except ValueError as e:
-    print(f"Warning: Agent initialization failed - {e}")
-    agent = None
+# Compress larger JSON/text responses when flask-compress is installed
+if Compress is not None:
+    app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+    app.config['COMPRESS_LEVEL'] = 4
+    app.config['COMPRESS_BR_LEVEL'] = 4
+    app.config['COMPRESS_MIN_SIZE'] = 500
+    Compress(app)
+
+# Agent is built on first use so importing the app (and booting workers) stays light
+_agent = None
+_agent_loaded = False
+_agent_lock = threading.Lock()
+
+def get_agent():
+    """Return the shared agent, creating it on first call; None if it cannot be initialized"""
+    global _agent, _agent_loaded
+    if not _agent_loaded:
+        with _agent_lock:
+            if not _agent_loaded:
+                try:
+                    from agent import CybersecurityAgent
+                    _agent = CybersecurityAgent()
+                except ValueError as e:
+                    print(f"Warning: Agent initialization failed - {e}")
+                _agent_loaded = True
+    return _agent
 
 # Initialize Twilio service
 twilio_service = TwilioService()
 
+# Blocking agent work runs on a shared pool so request workers wait with a deadline
+AGENT_TIMEOUT = 25
+MEDIA_TIMEOUT = 120  # transcription / frame analysis of uploads
+agent_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('SENTINEL_WORKERS', 32)),
+    thread_name_prefix='agent'
+)
+
+def run_agent(timeout, fn, *args, **kwargs):
+    """
+    Run fn on the agent pool; raises FutureTimeout if it takes longer than timeout
+    A job still queued at the deadline is cancelled rather than run for nobody
+    """
+    future = agent_executor.submit(fn, *args, **kwargs)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeout:
+        future.cancel()
+        raise
+
+def _call_then_remove(path, fn, *args, **kwargs):
+    """Call fn, then delete path whether or not it succeeded"""
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        os.remove(path)
+
+def run_agent_on_upload(timeout, path, fn, *args, **kwargs):
+    """
+    run_agent for a job reading an uploaded temp file; the job deletes the file
+    when it finishes, so a timed-out request never removes it mid-read
+    """
+    future = agent_executor.submit(_call_then_remove, path, fn, *args, **kwargs)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeout:
+        # A job cancelled before it started will never run its own cleanup
+        if future.cancel():
+            os.remove(path)
+        raise
+
+# Empty TwiML acknowledgement; replies are sent through the Twilio API instead
+EMPTY_TWIML = b'<?xml version="1.0" encoding="UTF-8"?><Response/>'
+TWIML_HEADERS = {'Content-Type': 'application/xml'}
+
+# Fixed SMS/WhatsApp replies by language
+EMPTY_MESSAGE_REPLY = MappingProxyType({
+    'en': "Please send a URL, message, or phone number to analyze.",
+    'hi': "कृपया विश्लेषण के लिए URL, संदेश या फ़ोन नंबर भेजें।"
+})
+ANALYSIS_FAILED_REPLY = MappingProxyType({
+    'en': "I couldn't analyze this message properly. Please try again.",
+    'hi': "मैं इस संदेश का ठीक से विश्लेषण नहीं कर सका। कृपया पुनः प्रयास करें।"
+})
+
+# Inbound Twilio messages waiting for or in analysis; beyond this the webhook answers 429
+twilio_pending = threading.BoundedSemaphore(int(os.environ.get('SENTINEL_TWILIO_BACKLOG', 64)))
+
+def timeout_response(what):
+    return jsonify({
+        'error': f'{what} timed out. Please try again.'
+    }), 504
+
+# Uploads go to per-request temp files, RAM-backed where /dev/shm is available
+UPLOAD_TEMP_DIR = '/dev/shm' if os.access('/dev/shm', os.W_OK) else None
+
+UPLOAD_BUFFER_SIZE = 1 << 20  # 1 MiB copy chunks (Werkzeug default is 16 KiB)
+
+def save_upload(file, suffix):
+    """Write an uploaded file to a unique temp path and return the path"""
+    with tempfile.NamedTemporaryFile(dir=UPLOAD_TEMP_DIR, suffix=suffix, delete=False) as tf:
+        file.save(tf, buffer_size=UPLOAD_BUFFER_SIZE)
+    return tf.name
+
+@app.errorhandler(413)
+def upload_too_large(e):
+    return jsonify({
+        'error': 'File too large. Maximum upload size is 200 MB.'
+    }), 413
+
+@app.before_request
+def reject_oversized_request():
+    """Refuse on the declared Content-Length, before any of the body is read or spooled"""
+    limit = app.config['MAX_CONTENT_LENGTH']
+    if request.content_length is not None and request.content_length > limit:
+        return upload_too_large(None)
+
 @app.route('/')
 def index():
     """Serve the main frontend"""
@@ -41,7 +188,7 @@ def health():
     """Health check endpoint"""
     return jsonify({
         'status': 'healthy',
-        'agent_initialized': agent is not None
+        'agent_initialized': get_agent() is not None
     })
 
 @app.route('/api/analyze', methods=['POST'])
@@ -50,6 +197,7 @@ def analyze():
     REFACTORED: Agentic analysis endpoint with multilingual support
     Uses orchestrator for intelligent, reasoned verdicts
     """
+    agent = get_agent()
     if not agent:
         return jsonify({
             'error': 'Agent not initialized. Please check API keys.'
@@ -65,14 +213,18 @@ def analyze():
                 'error': 'Input is required'
             }), 400
 
-        # Use new agentic analysis with language
-        result = agent.agentic_analyze(input_text, language=language)
+        # Use new agentic analysis with language; repeat inputs are served from
+        # the agent's result cache unless the client sends X-No-Cache
+        use_cache = not request.headers.get('X-No-Cache')
+        result = run_agent(AGENT_TIMEOUT, agent.agentic_analyze, input_text, language=language, use_cache=use_cache)
         
         if 'error' in result:
             return jsonify({'error': result['error']}), 500
 
         return jsonify(result)
 
+    except FutureTimeout:
+        return timeout_response('Analysis')
     except Exception as e:
         print(f"Analysis error: {e}")
         return jsonify({
@@ -84,6 +236,7 @@ def analyze_image():
     """
     REFACTORED: Analyze uploaded image with agentic reasoning
     """
+    agent = get_agent()
     if not agent:
         return jsonify({
             'error': 'Agent not initialized. Please check API keys.'
@@ -102,29 +255,24 @@ def analyze_image():
                 'error': 'No file selected'
             }), 400
 
-        # Save temporarily and analyze
-        image = Image.open(file.stream)
-        temp_path = '/tmp/sentinel_temp_image.jpg'
-        image.save(temp_path)
-
+        # Save temporarily and analyze (raw bytes; describe_image decodes the file itself)
+        temp_path = save_upload(file, '.jpg')
         # Describe image using agent
-        image_description = agent.describe_image(temp_path)
+        image_description = run_agent_on_upload(MEDIA_TIMEOUT, temp_path, agent.describe_image, temp_path)
 
         # Use agentic analysis on extracted text
-        result = agent.agentic_analyze(image_description)
+        result = run_agent(AGENT_TIMEOUT, agent.agentic_analyze, image_description)
         
         # Add extracted text to result
         result['extracted_text'] = image_description
 
-        # Clean up
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
-
         if 'error' in result:
             return jsonify({'error': result['error']}), 500
 
         return jsonify(result)
 
+    except FutureTimeout:
+        return timeout_response('Image analysis')
     except Exception as e:
         print(f"Image analysis error: {e}")
         return jsonify({
@@ -137,6 +285,7 @@ def analyze_voice():
     NEW: Analyze voice recording for scam detection
     Accepts audio files (WAV, MP3, M4A)
     """
+    agent = get_agent()
     if not agent:
         return jsonify({
             'error': 'Agent not initialized. Please check API keys.'
@@ -157,21 +306,17 @@ def analyze_voice():
 
         # Save temporarily
         file_ext = file.filename.rsplit('.', 1)[1].lower() if '.' in file.filename else 'mp3'
-        temp_path = f'/tmp/sentinel_voice.{file_ext}'
-        file.save(temp_path)
-
+        temp_path = save_upload(file, f'.{file_ext}')
         # Analyze using agentic voice analysis
-        result = agent.agentic_analyze(temp_path, input_type_hint='voice')
-
-        # Clean up
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
+        result = run_agent_on_upload(MEDIA_TIMEOUT, temp_path, agent.agentic_analyze, temp_path, input_type_hint='voice')
 
         if 'error' in result:
             return jsonify({'error': result['error']}), 500
 
         return jsonify(result)
 
+    except FutureTimeout:
+        return timeout_response('Voice analysis')
     except Exception as e:
         print(f"Voice analysis error: {e}")
         return jsonify({
@@ -184,6 +329,7 @@ def analyze_video():
     NEW: Analyze video for deepfake detection
     Accepts video files (MP4, AVI, MOV, MKV)
     """
+    agent = get_agent()
     if not agent:
         return jsonify({
             'error': 'Agent not initialized. Please check API keys.'
@@ -204,21 +350,17 @@ def analyze_video():
 
         # Save temporarily
         file_ext = file.filename.rsplit('.', 1)[1].lower() if '.' in file.filename else 'mp4'
-        temp_path = f'/tmp/sentinel_video.{file_ext}'
-        file.save(temp_path)
-
+        temp_path = save_upload(file, f'.{file_ext}')
         # Analyze using deepfake detection
-        result = agent.agentic_analyze(temp_path, input_type_hint='video')
-
-        # Clean up
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
+        result = run_agent_on_upload(MEDIA_TIMEOUT, temp_path, agent.agentic_analyze, temp_path, input_type_hint='video')
 
         if 'error' in result:
             return jsonify({'error': result['error']}), 500
 
         return jsonify(result)
 
+    except FutureTimeout:
+        return timeout_response('Video analysis')
     except Exception as e:
         print(f"Video analysis error: {e}")
         return jsonify({
@@ -230,6 +372,7 @@ def analyze_image_deepfake():
     """
     NEW: Analyze image specifically for deepfake detection
     """
+    agent = get_agent()
     if not agent:
         return jsonify({
             'error': 'Agent not initialized. Please check API keys.'
@@ -248,23 +391,18 @@ def analyze_image_deepfake():
                 'error': 'No file selected'
             }), 400
 
-        # Save temporarily
-        image = Image.open(file.stream)
-        temp_path = '/tmp/sentinel_deepfake_image.jpg'
-        image.save(temp_path)
-
+        # Save temporarily (raw bytes; the detector decodes the file itself)
+        temp_path = save_upload(file, '.jpg')
         # Analyze for deepfakes
-        result = agent.agentic_analyze(temp_path, input_type_hint='image_deepfake')
-
-        # Clean up
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
+        result = run_agent_on_upload(MEDIA_TIMEOUT, temp_path, agent.agentic_analyze, temp_path, input_type_hint='image_deepfake')
 
         if 'error' in result:
             return jsonify({'error': result['error']}), 500
 
         return jsonify(result)
 
+    except FutureTimeout:
+        return timeout_response('Deepfake analysis')
     except Exception as e:
         print(f"Deepfake analysis error: {e}")
         return jsonify({
@@ -276,6 +414,7 @@ def get_threat_news():
     """
     NEW: Get recent cyber threat news
     """
+    agent = get_agent()
     if not agent:
         return jsonify({
             'error': 'Agent not initialized. Please check API keys.'
@@ -285,10 +424,12 @@ def get_threat_news():
         days = request.args.get('days', 7, type=int)
         limit = request.args.get('limit', 20, type=int)
         
-        result = agent.get_threat_news(days_back=days, max_results=limit)
+        result = run_agent(AGENT_TIMEOUT, agent.get_threat_news, days_back=days, max_results=limit)
         
         return jsonify(result)
 
+    except FutureTimeout:
+        return timeout_response('Threat news')
     except Exception as e:
         print(f"Threat news error: {e}")
         return jsonify({
@@ -320,13 +461,15 @@ def twilio_inbound():
     - Language detection (English/Hindi)
     - Professional, analyst-style responses
     - No emojis, no slang, no alarmist language
+    - Acknowledged immediately; analysis and reply run in the background
     """
+    agent = get_agent()
     if not agent:
         # Graceful fallback - never expose internal errors
-        return '<?xml version="1.0" encoding="UTF-8"?><Response></Response>', 503
+        return EMPTY_TWIML, 503, TWIML_HEADERS
     
     if not twilio_service.is_enabled():
-        return '<?xml version="1.0" encoding="UTF-8"?><Response></Response>', 503
+        return EMPTY_TWIML, 503, TWIML_HEADERS
     
     try:
         # Clean up expired sessions periodically
@@ -335,20 +478,43 @@ def twilio_inbound():
         # Parse incoming message
         message_data = twilio_service.parse_incoming_message(request.values)
         
+        # Shed load instead of queueing unbounded work behind the agent
+        if not twilio_pending.acquire(blocking=False):
+            return EMPTY_TWIML, 429, TWIML_HEADERS
+        try:
+            agent_executor.submit(process_twilio_message, message_data)
+        except Exception:
+            twilio_pending.release()
+            raise
+        
+        # Return empty TwiML response (Twilio expects this); the reply is sent via the API
+        return EMPTY_TWIML, 200, TWIML_HEADERS
+        
+    except Exception as e:
+        # Catch-all error handler - never expose internals
+        print(f"Twilio webhook error: {e}")
+        return EMPTY_TWIML, 500, TWIML_HEADERS
+
+def process_twilio_message(message_data):
+    """
+    Analyze an inbound SMS/WhatsApp message and reply through the Twilio API
+    Runs on agent_executor, off the webhook request
+    """
+    agent = get_agent()
+    try:
         user_input = message_data['body'].strip()
         sender = message_data['from']
         channel = message_data['channel']
         
         # Handle empty messages
         if not user_input:
-            fallback_msg = "Please send a URL, message, or phone number to analyze." if twilio_service.detect_language("") == 'en' else "कृपया विश्लेषण के लिए URL, संदेश या फ़ोन नंबर भेजें।"
-            
+            # An empty body carries no language signal: always English
             twilio_service.send_message(
                 to=sender,
-                body=fallback_msg,
+                body=EMPTY_MESSAGE_REPLY['en'],
                 channel=channel
             )
-            return '<?xml version="1.0" encoding="UTF-8"?><Response></Response>', 200
+            return
         
         # Get conversation context
         context_summary = twilio_service.get_conversation_context(sender)
@@ -369,14 +535,12 @@ def twilio_inbound():
             # Graceful fallback - never expose stack traces
             print(f"Agent analysis error: {analysis_error}")
             
-            fallback_msg = "I couldn't analyze this message properly. Please try again." if language == 'en' else "मैं इस संदेश का ठीक से विश्लेषण नहीं कर सका। कृपया पुनः प्रयास करें।"
-            
             twilio_service.send_message(
                 to=sender,
-                body=fallback_msg,
+                body=ANALYSIS_FAILED_REPLY.get(language, ANALYSIS_FAILED_REPLY['en']),
                 channel=channel
             )
-            return '<?xml version="1.0" encoding="UTF-8"?><Response></Response>', 200
+            return
         
         # Format response for SMS (concise, professional)
         response_text = twilio_service.format_response_for_sms(result, language)
@@ -402,14 +566,20 @@ def twilio_inbound():
         if not send_result['success']:
             # Log failure but don't expose to user
             print(f"Twilio send failed for {sender[:10]}...")
-        
-        # Return empty TwiML response (Twilio expects this)
-        return '<?xml version="1.0" encoding="UTF-8"?><Response></Response>', 200
-        
+    
     except Exception as e:
-        # Catch-all error handler - never expose internals
-        print(f"Twilio webhook error: {e}")
-        return '<?xml version="1.0" encoding="UTF-8"?><Response></Response>', 500
+        print(f"Twilio processing error: {e}")
+    finally:
+        twilio_pending.release()
+
+@lru_cache(maxsize=1)
+def questions_payload():
+    """Serialized question list; built on first request (the RAG module is heavy to import)"""
+    from educationalModuleRAG import QUESTIONS
+    return orjson.dumps({
+        'questions': QUESTIONS[:10],  # Return first 10 questions
+        'total': len(QUESTIONS)
+    })
 
 @app.route('/api/education/questions', methods=['GET'])
 def get_questions():
@@ -417,11 +587,7 @@ def get_questions():
     Get educational questions
     """
     try:
-        from educationalModuleRAG import QUESTIONS
-        return jsonify({
-            'questions': QUESTIONS[:10],  # Return first 10 questions
-            'total': len(QUESTIONS)
-        })
+        return app.response_class(questions_payload(), mimetype='application/json')
     except Exception as e:
         print(f"Error loading questions: {e}")
         return jsonify({
@@ -433,6 +599,7 @@ def check_answer():
     """
     Check educational answer
     """
+    agent = get_agent()
     if not agent:
         return jsonify({
             'error': 'Agent not initialized. Please check API keys.'
@@ -461,12 +628,14 @@ def check_answer():
         Be constructive and educational.
         """
 
-        feedback = agent.llm.invoke(prompt)
+        feedback = run_agent(AGENT_TIMEOUT, agent.llm.invoke, prompt)
         
         return jsonify({
             'feedback': feedback.content if hasattr(feedback, 'content') else str(feedback)
         })
 
+    except FutureTimeout:
+        return timeout_response('Answer checking')
     except Exception as e:
         print(f"Answer checking error: {e}")
         return jsonify({
@@ -483,7 +652,7 @@ if __name__ == '__main__':
     ╚══════════════════════════════════════════╝
     
     Server running on: http://localhost:{port}
-    Agent initialized: {agent is not None}
+    Agent initialized: {get_agent() is not None}
     Agentic Mode: ENABLED
     Voice Analysis: ENABLED
     
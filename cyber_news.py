@@ -4,17 +4,71 @@ Fetches and correlates live cybersecurity news with analysis
 """
 
 import os
+import re
+import threading
 import requests
+from collections import Counter, defaultdict
+from requests.adapters import HTTPAdapter
 from datetime import datetime, timedelta
+from types import MappingProxyType
 from typing import List, Dict, Optional
+from cachetools import LRUCache, TTLCache
 from dotenv import load_dotenv
 
+try:
+    import numpy as np
+    from langchain_openai import OpenAIEmbeddings
+except ImportError:
+    np = None
+    OpenAIEmbeddings = None
+
 load_dotenv()
 
+# News moves on an hour scale: serve repeat queries from memory for a few minutes.
+# ETags outlive the TTL so an expired entry can be revalidated with If-None-Match.
+_news_cache = TTLCache(maxsize=32, ttl=300)
+_news_etags = LRUCache(maxsize=32)  # key -> (etag, articles)
+_news_lock = threading.Lock()
+
+# Shared stand-in for articles without a source object
+_NO_SOURCE = MappingProxyType({})
+
+# Query fields shared by every NewsAPI request
+_NEWS_QUERY_PARAMS = {
+    'q': 'cybersecurity OR "data breach" OR phishing OR malware OR ransomware',
+    'sortBy': 'publishedAt',
+    'language': 'en'
+}
+
+# Impact indicators, compiled into one case-insensitive alternation (high terms tried first)
+_HIGH_IMPACT_TERMS = (
+    'zero-day', 'critical vulnerability', 'widespread',
+    'major breach', 'millions affected', 'ransomware attack',
+    'supply chain', 'nation-state'
+)
+_MEDIUM_IMPACT_TERMS = (
+    'vulnerability', 'exploit', 'breach', 'malware',
+    'phishing campaign', 'security flaw'
+)
+# Title words long enough to be meaningful for keyword correlation
+_KEYWORD_RE = re.compile(r'[a-z0-9]{6,}')
+
+_IMPACT_RE = re.compile(
+    '(?P<high>' + '|'.join(map(re.escape, _HIGH_IMPACT_TERMS)) + ')'
+    '|(?P<medium>' + '|'.join(map(re.escape, _MEDIUM_IMPACT_TERMS)) + ')',
+    re.IGNORECASE
+)
+
 class CyberNewsIntelligence:
-    def __init__(self):
+    def __init__(self, embedder=None):
         self.api_key = os.environ.get('NEWS_API_KEY')
         self.base_url = 'https://newsapi.org/v2/everything'
+        # Pooled keep-alive session; the key travels as a header instead of a query param
+        self.http = requests.Session()
+        self.http.mount('https://', HTTPAdapter(pool_connections=10, pool_maxsize=10))
+        if self.api_key:
+            self.http.headers['X-Api-Key'] = self.api_key
+        self.http.params = dict(_NEWS_QUERY_PARAMS)
         
         # Cybersecurity keywords for filtering
         self.keywords = [
@@ -22,6 +76,18 @@ class CyberNewsIntelligence:
             'ransomware', 'zero-day', 'vulnerability', 'exploit',
             'hacking', 'cyber attack', 'security breach', 'threat actor'
         ]
+        
+        # Semantic correlation: news embeddings are computed once per news refresh
+        self.embedding_model = 'text-embedding-3-small'
+        self.similarity_threshold = 0.45
+        self._embedder = embedder  # shared with the agent when provided
+        self._index = None  # (news_items, normalized embedding matrix)
+        self._keyword_index = None  # (news_items, {title word: [article positions]})
+    
+    def __del__(self):
+        http = getattr(self, 'http', None)
+        if http is not None:
+            http.close()
     
     def fetch_recent_threats(self, days_back: int = 7, max_results: int = 20) -> List[Dict]:
         """
@@ -32,33 +98,35 @@ class CyberNewsIntelligence:
         
         try:
             from_date = (datetime.now() - timedelta(days=days_back)).strftime('%Y-%m-%d')
+            key = (days_back, max_results, from_date)
+            with _news_lock:
+                cached = _news_cache.get(key)
+                validator = _news_etags.get(key)
+            if cached is not None:
+                return list(cached)
             
-            params = {
-                'q': 'cybersecurity OR "data breach" OR phishing OR malware OR ransomware',
-                'from': from_date,
-                'sortBy': 'publishedAt',
-                'language': 'en',
-                'pageSize': max_results,
-                'apiKey': self.api_key
-            }
+            # Fixed query fields are session defaults; only the window varies
+            params = {'from': from_date, 'pageSize': max_results}
             
-            response = requests.get(self.base_url, params=params, timeout=10)
+            headers = {'If-None-Match': validator[0]} if validator else None
+            response = self.http.get(self.base_url, params=params, headers=headers, timeout=10)
+            
+            if response.status_code == 304 and validator:
+                articles = validator[1]
+                with _news_lock:
+                    _news_cache[key] = articles
+                return list(articles)
             
             if response.status_code == 200:
                 data = response.json()
-                articles = data.get('articles', [])
+                articles = [self._parse_article(article) for article in data.get('articles', [])]
                 
-                return [
-                    {
-                        'title': article.get('title', ''),
-                        'description': article.get('description', ''),
-                        'source': article.get('source', {}).get('name', 'Unknown'),
-                        'url': article.get('url', ''),
-                        'published_at': article.get('publishedAt', ''),
-                        'impact_level': self._assess_impact(article)
-                    }
-                    for article in articles
-                ]
+                with _news_lock:
+                    _news_cache[key] = articles
+                    etag = response.headers.get('ETag')
+                    if etag:
+                        _news_etags[key] = (etag, articles)
+                return list(articles)
             else:
                 return []
                 
@@ -66,55 +134,129 @@ class CyberNewsIntelligence:
             print(f"News fetch error: {e}")
             return []
     
+    def _parse_article(self, article: Dict) -> Dict:
+        """Reduce a NewsAPI article to the fields the app uses"""
+        return {
+            'title': article.get('title', ''),
+            'description': article.get('description', ''),
+            'source': (article.get('source') or _NO_SOURCE).get('name', 'Unknown'),
+            'url': article.get('url', ''),
+            'published_at': article.get('publishedAt', ''),
+            'impact_level': self._assess_impact(article)
+        }
+    
     def _assess_impact(self, article: Dict) -> str:
         """
         Assess impact level based on article content
         Uses calm, analytical language
         """
-        title = article.get('title', '').lower()
-        description = article.get('description', '').lower()
-        content = f"{title} {description}"
-        
-        # High impact indicators
-        high_impact_terms = [
-            'zero-day', 'critical vulnerability', 'widespread',
-            'major breach', 'millions affected', 'ransomware attack',
-            'supply chain', 'nation-state'
-        ]
-        
-        # Medium impact indicators
-        medium_impact_terms = [
-            'vulnerability', 'exploit', 'breach', 'malware',
-            'phishing campaign', 'security flaw'
-        ]
+        content = f"{article.get('title') or ''} {article.get('description') or ''}"
         
-        if any(term in content for term in high_impact_terms):
-            return 'significant'
-        elif any(term in content for term in medium_impact_terms):
-            return 'moderate'
-        else:
-            return 'informational'
+        # One scan over the text; stop at the first high-impact term
+        level = 'informational'
+        for match in _IMPACT_RE.finditer(content):
+            if match.lastgroup == 'high':
+                return 'significant'
+            level = 'moderate'
+        return level
     
     def correlate_with_analysis(self, analysis_input: str, news_items: List[Dict]) -> Optional[Dict]:
         """
         Check if current analysis relates to recent news
         """
-        input_lower = analysis_input.lower()
+        if not news_items:
+            return None
+        
+        # Title keywords -> article positions, built once per news refresh
+        if self._keyword_index is None or self._keyword_index[0] is not news_items:
+            self._keyword_index = (news_items, self._build_keyword_index(news_items))
+        index = self._keyword_index[1]
         
-        for item in news_items:
-            title_lower = item['title'].lower()
-            desc_lower = item.get('description', '').lower()
+        # Rank articles by how many distinct title keywords the input shares with them
+        hits = Counter()
+        for token in set(_KEYWORD_RE.findall(analysis_input.lower())):
+            hits.update(index.get(token, ()))
+        if not hits:
+            return None
+        
+        # Highest score wins; ties go to the earlier (more recent) article
+        best = min(hits, key=lambda i: (-hits[i], i))
+        item = news_items[best]
+        return {
+            'related': True,
+            'article': item,
+            'context': f"This may relate to a recent threat: {item['title']}"
+        }
+    
+    @staticmethod
+    def _build_keyword_index(news_items: List[Dict]) -> Dict[str, List[int]]:
+        """Map each significant (6+ char) title word to the articles containing it"""
+        index = defaultdict(list)
+        for i, item in enumerate(news_items):
+            for token in set(_KEYWORD_RE.findall((item.get('title') or '').lower())):
+                index[token].append(i)
+        return dict(index)
+    
+    def build_index(self, news_items: List[Dict]):
+        """
+        Embed every article (title + description) in one batched call
+        and keep the row-normalized matrix for cosine lookups
+        """
+        texts = [f"{item['title']}. {item.get('description') or ''}" for item in news_items]
+        vectors = np.asarray(self._get_embedder().embed_documents(texts), dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
+        self._index = (news_items, vectors)
+        return vectors
+    
+    def correlate_semantic(self, analysis_input: str, news_items: List[Dict], k: int = 3,
+                           query_embedding: Optional[List[float]] = None) -> Optional[Dict]:
+        """
+        Embedding-based correlation against recent news
+        Pass query_embedding to reuse a vector the caller already computed;
+        falls back to keyword correlation when embeddings are unavailable
+        """
+        if not news_items:
+            return None
+        
+        try:
+            if self._index is not None and self._index[0] is news_items:
+                vectors = self._index[1]
+            else:
+                vectors = self.build_index(news_items)
+            
+            if query_embedding is None:
+                query_embedding = self._get_embedder().embed_query(analysis_input)
+            query = np.array(query_embedding, dtype=np.float32)
+            query /= np.linalg.norm(query) + 1e-12
             
-            # Extract domains/keywords from news
-            # Simple correlation - can be enhanced with NLP
-            if any(word in input_lower for word in title_lower.split() if len(word) > 5):
-                return {
-                    'related': True,
-                    'article': item,
-                    'context': f"This may relate to a recent threat: {item['title']}"
-                }
+            similarities = vectors @ query
+            top = np.argsort(similarities)[::-1][:k]
+        except Exception as e:
+            print(f"Semantic news correlation unavailable, using keywords: {e}")
+            return self.correlate_with_analysis(analysis_input, news_items)
+        
+        best = int(top[0])
+        if similarities[best] < self.similarity_threshold:
+            return None
         
-        return None
+        item = news_items[best]
+        return {
+            'related': True,
+            'article': item,
+            'similarity': float(similarities[best]),
+            'matches': [news_items[int(i)]['title'] for i in top],
+            'context': f"This may relate to a recent threat: {item['title']}"
+        }
+    
+    def _get_embedder(self):
+        if np is None or OpenAIEmbeddings is None:
+            raise RuntimeError("numpy and langchain-openai are required for semantic correlation")
+        if self._embedder is None:
+            self._embedder = OpenAIEmbeddings(
+                model=self.embedding_model,
+                openai_api_key=os.environ.get('OPENAI_API_KEY')
+            )
+        return self._embedder
     
     def get_threat_summary(self, news_items: List[Dict]) -> Dict:
         """
@@ -129,15 +271,8 @@ class CyberNewsIntelligence:
                 'summary': 'No recent threat intelligence available'
             }
         
-        impact_counts = {
-            'significant': 0,
-            'moderate': 0,
-            'informational': 0
-        }
-        
-        for item in news_items:
-            impact = item.get('impact_level', 'informational')
-            impact_counts[impact] = impact_counts.get(impact, 0) + 1
+        # Impact levels were assigned while parsing; just tally them
+        impact_counts = Counter(item.get('impact_level', 'informational') for item in news_items)
         
         summary_parts = []
         if impact_counts['significant'] > 0:
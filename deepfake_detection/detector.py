@@ -4,12 +4,42 @@ Supports both images and videos (frame sampling)
 """
 
 import os
+import queue
+import threading
 import cv2
 import numpy as np
-from typing import Dict, Optional, List
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Iterator, Optional, List
 from PIL import Image
 import io
 
+# Samples further apart than this many frames are reached by seeking rather than
+# by decoding through the stream (roughly a long GOP at 25-30 fps)
+SEEK_FRAME_SPAN = 250
+
+# Longest side (px) of the image handed to the face detector
+DETECT_MAX_SIDE = 640
+
+# Fraction of a face box added on each side when re-finding it in the next sampled frame
+TRACK_MARGIN = 0.25
+
+# OpenCV Zoo YuNet face detector; used instead of the Haar cascade when the model file exists
+YUNET_MODEL_PATH = os.environ.get(
+    'SENTINEL_YUNET_MODEL',
+    os.path.join(os.path.dirname(__file__), 'models', 'face_detection_yunet_2023mar.onnx')
+)
+
+@lru_cache(maxsize=1)
+def _gpu_video_decoder():
+    """torchcodec's VideoDecoder when torch sees a CUDA device, else None (checked once)"""
+    try:
+        import torch
+        from torchcodec.decoders import VideoDecoder
+    except ImportError:
+        return None
+    return VideoDecoder if torch.cuda.is_available() else None
+
 class DeepfakeDetector:
     """
     Deepfake detector using heuristic analysis
@@ -21,19 +51,51 @@ class DeepfakeDetector:
     - Ensemble methods
     """
     
+    # Face detectors are parsed once per process and shared by every instance
+    _face_detectors = None
+    _load_lock = threading.Lock()
+    # YuNet's input size is detector state, so size + detect must not interleave across threads
+    _yunet_lock = threading.Lock()
+    
     def __init__(self):
         self.face_cascade = None
+        self.face_yunet = None
+        self.use_opencl = self._enable_opencl()
+        self._opencl_verified = False
         self._load_face_detector()
     
+    @staticmethod
+    def _enable_opencl() -> bool:
+        """Turn on OpenCV's T-API so UMat inputs run on an OpenCL device (iGPU) when present"""
+        try:
+            cv2.ocl.setUseOpenCL(True)
+            return cv2.ocl.useOpenCL()
+        except (AttributeError, cv2.error):
+            return False
+    
     def _load_face_detector(self):
-        """Load OpenCV face detector"""
+        """Load OpenCV face detector (process-wide, on first use)"""
+        with DeepfakeDetector._load_lock:
+            if DeepfakeDetector._face_detectors is None:
+                DeepfakeDetector._face_detectors = self._create_face_detectors()
+        self.face_yunet, self.face_cascade = DeepfakeDetector._face_detectors
+    
+    @staticmethod
+    def _create_face_detectors() -> tuple:
+        """(YuNet, None) when the YuNet model is available, else (None, Haar cascade)"""
+        if os.path.exists(YUNET_MODEL_PATH) and hasattr(cv2, 'FaceDetectorYN'):
+            try:
+                return cv2.FaceDetectorYN.create(YUNET_MODEL_PATH, "", (320, 320)), None
+            except cv2.error as e:
+                print(f"YuNet load warning: {e}")
+        
         try:
             # Try to load Haar Cascade for face detection
             cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-            self.face_cascade = cv2.CascadeClassifier(cascade_path)
+            return None, cv2.CascadeClassifier(cascade_path)
         except Exception as e:
             print(f"Face detector load warning: {e}")
-            self.face_cascade = None
+            return None, None
     
     def analyze_image(self, image_path: str) -> Dict:
         """
@@ -42,17 +104,31 @@ class DeepfakeDetector:
         Returns structured result with confidence and reasoning
         """
         try:
-            # Load image
             img = cv2.imread(image_path)
-            if img is None:
-                return {
-                    'error': 'Unable to load image',
-                    'authentic': None,
-                    'confidence': 0
-                }
-            
+        except Exception as e:
+            return {
+                'error': f'Analysis failed: {str(e)}',
+                'authentic': None,
+                'confidence': 0
+            }
+        if img is None:
+            return {
+                'error': 'Unable to load image',
+                'authentic': None,
+                'confidence': 0
+            }
+        
+        return self._analyze_ndarray(img)
+    
+    def _analyze_ndarray(self, img, faces=None) -> Dict:
+        """
+        Analyze an already-decoded BGR image (a loaded file or a video frame)
+        faces: boxes already located by the caller, else detected here
+        """
+        try:
             # Detect faces
-            faces = self._detect_faces(img)
+            if faces is None:
+                faces = self._detect_faces(img)
             
             if len(faces) == 0:
                 return {
@@ -64,13 +140,18 @@ class DeepfakeDetector:
                     'limitations': 'Face detection required for deepfake analysis'
                 }
             
-            # Analyze each face
+            # Analyze each face (independent OpenCV/NumPy work that releases the GIL,
+            # so several faces are scored in parallel)
+            rois = [img[y:y+h, x:x+w] for (x, y, w, h) in faces]
+            if len(rois) > 1:
+                with ThreadPoolExecutor(max_workers=min(len(rois), os.cpu_count() or 1)) as ex:
+                    face_results = list(ex.map(self._analyze_face_region, rois))
+            else:
+                face_results = [self._analyze_face_region(roi) for roi in rois]
+            
             indicators = []
             scores = []
-            
-            for (x, y, w, h) in faces:
-                face_roi = img[y:y+h, x:x+w]
-                face_score, face_indicators = self._analyze_face_region(face_roi)
+            for face_score, face_indicators in face_results:
                 scores.append(face_score)
                 indicators.extend(face_indicators)
             
@@ -138,24 +219,26 @@ class DeepfakeDetector:
             
             frame_results = []
             
-            for frame_idx in frame_indices:
-                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
-                ret, frame = cap.read()
+            # NVDEC batch decode when available, else OpenCV on a reader thread
+            # (overlapping decode with analysis of earlier frames)
+            frames = self._read_frames_gpu(video_path, frame_indices)
+            if frames is None:
+                frames = self._prefetch(self._read_frames(cap, frame_indices, total_frames))
+            
+            prev_faces = None
+            for frame in frames:
+                # Sampled frames share faces: look near the previous boxes first
+                try:
+                    faces = self._track_faces(frame, prev_faces)
+                except Exception:
+                    faces = None  # full detection (and its error reporting) below
+                prev_faces = faces
                 
-                if ret:
-                    # Save frame temporarily
-                    temp_path = f'/tmp/sentinel_frame_{frame_idx}.jpg'
-                    cv2.imwrite(temp_path, frame)
-                    
-                    # Analyze frame
-                    result = self.analyze_image(temp_path)
-                    
-                    if 'error' not in result and result.get('authentic') is not None:
-                        frame_results.append(result)
-                    
-                    # Cleanup
-                    if os.path.exists(temp_path):
-                        os.remove(temp_path)
+                # Analyze the decoded frame directly (no temp file round trip)
+                result = self._analyze_ndarray(frame, faces)
+                
+                if 'error' not in result and result.get('authentic') is not None:
+                    frame_results.append(result)
             
             cap.release()
             
@@ -207,18 +290,178 @@ class DeepfakeDetector:
                 'confidence': 0
             }
     
+    @staticmethod
+    def _read_frames(cap, frame_indices, total_frames: int) -> Iterator:
+        """
+        Yield the decoded frames at the given indices, in order
+        Seeking (CAP_PROP_POS_FRAMES) rewinds to a keyframe and re-decodes the GOP,
+        so unless samples are very sparse it is cheaper to grab() through the
+        stream and only retrieve() the sampled frames
+        """
+        targets = sorted({int(i) for i in frame_indices})
+        if not targets:
+            return
+        
+        if len(targets) * SEEK_FRAME_SPAN < total_frames:
+            for frame_idx in targets:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+                ret, frame = cap.read()
+                if ret:
+                    yield frame
+            return
+        
+        target_set = set(targets)
+        for frame_idx in range(targets[-1] + 1):
+            if not cap.grab():
+                break
+            if frame_idx in target_set:
+                ret, frame = cap.retrieve()
+                if ret:
+                    yield frame
+    
+    @staticmethod
+    def _read_frames_gpu(video_path: str, frame_indices) -> Optional[List]:
+        """
+        Decode the sampled frames in one batched call on the GPU (torchcodec/NVDEC)
+        Returns BGR uint8 arrays like cv2, or None when GPU decode is unavailable or fails
+        """
+        decoder_cls = _gpu_video_decoder()
+        if decoder_cls is None:
+            return None
+        
+        try:
+            decoder = decoder_cls(video_path, device='cuda')
+            batch = decoder.get_frames_at(indices=[int(i) for i in frame_indices]).data
+            # (N, C, H, W) RGB on the device -> (N, H, W, C) BGR on the host
+            rgb = batch.permute(0, 2, 3, 1).cpu().numpy()
+            return [np.ascontiguousarray(frame[..., ::-1]) for frame in rgb]
+        except Exception as e:
+            print(f"GPU video decode unavailable, using OpenCV: {e}")
+            return None
+    
+    @staticmethod
+    def _prefetch(frames: Iterator, depth: int = 2) -> Iterator:
+        """
+        Run a frame iterator on a background thread, buffering up to depth frames
+        OpenCV releases the GIL while decoding, so decode overlaps the consumer's work
+        """
+        buffer = queue.Queue(maxsize=depth)
+        done = object()
+        stop = threading.Event()
+        errors = []
+        
+        def reader():
+            try:
+                for frame in frames:
+                    if stop.is_set():
+                        break
+                    buffer.put(frame)
+            except Exception as e:
+                errors.append(e)  # re-raised on the consumer side
+            finally:
+                buffer.put(done)
+        
+        thread = threading.Thread(target=reader, name='frame-reader', daemon=True)
+        thread.start()
+        frame = None
+        try:
+            while True:
+                frame = buffer.get()
+                if frame is done:
+                    break
+                yield frame
+            if errors:
+                raise errors[0]
+        finally:
+            # Consumer stopped early: unblock the reader until it signals completion
+            if frame is not done:
+                stop.set()
+                while buffer.get() is not done:
+                    pass
+            thread.join()
+    
     def _detect_faces(self, img) -> List:
         """Detect faces in image"""
-        if self.face_cascade is None:
+        if self.face_yunet is None and self.face_cascade is None:
             return []
         
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        faces = self.face_cascade.detectMultiScale(
-            gray,
-            scaleFactor=1.1,
-            minNeighbors=5,
-            minSize=(30, 30)
-        )
+        # Detection cost grows super-linearly with resolution: detect on a downscaled
+        # copy and map the rectangles back onto the full-resolution image
+        h, w = img.shape[:2]
+        scale = min(1.0, DETECT_MAX_SIDE / max(h, w))
+        if scale < 1.0:
+            img = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        
+        if self.face_yunet is not None:
+            faces = self._run_yunet(img)
+        else:
+            faces = self._run_cascade(cv2.cvtColor(img, cv2.COLOR_BGR2GRAY))
+        
+        if scale < 1.0 and len(faces):
+            faces = np.round(np.asarray(faces) / scale).astype(int)
+        
+        return faces
+    
+    def _track_faces(self, img, prev_faces) -> List:
+        """
+        Faces in a video frame, re-found around the previous sampled frame's boxes
+        Each box, grown by TRACK_MARGIN, is searched on its own; the whole frame is
+        only scanned when there is no previous box or one of them lost its face
+        """
+        if prev_faces is None or len(prev_faces) == 0:
+            return self._detect_faces(img)
+        
+        img_h, img_w = img.shape[:2]
+        tracked = []
+        for (x, y, w, h) in prev_faces:
+            mx, my = int(w * TRACK_MARGIN), int(h * TRACK_MARGIN)
+            x0, y0 = max(0, x - mx), max(0, y - my)
+            x1, y1 = min(img_w, x + w + mx), min(img_h, y + h + my)
+            found = self._detect_faces(img[y0:y1, x0:x1])
+            if len(found) != 1:
+                return self._detect_faces(img)
+            fx, fy, fw, fh = found[0]
+            tracked.append((x0 + fx, y0 + fy, fw, fh))
+        
+        return tracked
+    
+    def _run_yunet(self, img):
+        """YuNet detection on a BGR image, as integer (x, y, w, h) rows"""
+        h, w = img.shape[:2]
+        with self._yunet_lock:
+            self.face_yunet.setInputSize((w, h))
+            _, faces = self.face_yunet.detect(img)
+        if faces is None:
+            return []
+        
+        boxes = faces[:, :4].astype(int)
+        boxes[:, :2] = np.maximum(boxes[:, :2], 0)  # boxes may start just outside the frame
+        return boxes
+    
+    def _run_cascade(self, gray):
+        """detectMultiScale, on the OpenCL device when available"""
+        # Skip pyramid scales too small to hold a face at this resolution; faces may
+        # fill the whole frame (cropped portraits), so the top scale stays unbounded
+        min_side = max(30, min(gray.shape[:2]) // 20)
+        params = dict(scaleFactor=1.2, minNeighbors=5, minSize=(min_side, min_side))
+        if not self.use_opencl:
+            return self.face_cascade.detectMultiScale(gray, **params)
+        
+        try:
+            faces = self.face_cascade.detectMultiScale(cv2.UMat(gray), **params)
+        except cv2.error:
+            faces = None
+        
+        # Some drivers/cascades silently return nothing under OpenCL: check against
+        # the CPU until the two agree on a frame with faces, else stay on the CPU
+        if faces is None or not self._opencl_verified:
+            cpu_faces = self.face_cascade.detectMultiScale(gray, **params)
+            if faces is None or len(faces) != len(cpu_faces):
+                print("OpenCL face detection mismatch, falling back to CPU")
+                self.use_opencl = False
+            elif len(cpu_faces):
+                self._opencl_verified = True
+            return cpu_faces
         
         return faces
     
@@ -235,8 +478,17 @@ class DeepfakeDetector:
         indicators = []
         score = 50  # Start neutral
         
+        # One grayscale conversion shared by the noise and compression checks
+        gray = cv2.cvtColor(face_roi, cv2.COLOR_BGR2GRAY) if face_roi.ndim == 3 else face_roi
+        
+        # Image statistics, each a single pass over its buffer (no temporary masks)
+        # Canny/Laplacian take UMat copies when OpenCL is on; only scalars are read back
+        color_std = face_roi.std()
+        edges = cv2.Canny(cv2.UMat(face_roi) if self.use_opencl else face_roi, 100, 200)
+        edge_density = cv2.countNonZero(edges) / (face_roi.shape[0] * face_roi.shape[1])
+        noise_level = self._estimate_noise(cv2.UMat(gray) if self.use_opencl else gray)
+        
         # Check 1: Color consistency
-        color_std = np.std(face_roi)
         if color_std < 20:
             indicators.append('Unusually uniform color distribution')
             score -= 15
@@ -244,9 +496,6 @@ class DeepfakeDetector:
             score += 10
         
         # Check 2: Edge analysis
-        edges = cv2.Canny(face_roi, 100, 200)
-        edge_density = np.sum(edges > 0) / edges.size
-        
         if edge_density < 0.05:
             indicators.append('Low edge definition')
             score -= 10
@@ -255,13 +504,12 @@ class DeepfakeDetector:
             score += 10
         
         # Check 3: Noise analysis
-        noise_level = self._estimate_noise(face_roi)
         if noise_level < 5:
             indicators.append('Suspiciously low noise level')
             score -= 10
         
         # Check 4: Compression artifacts
-        if self._detect_compression_artifacts(face_roi):
+        if self._detect_compression_artifacts(gray):
             indicators.append('Compression artifacts detected')
             score -= 5
         
@@ -270,39 +518,35 @@ class DeepfakeDetector:
         
         return score, indicators
     
-    def _estimate_noise(self, img) -> float:
-        """Estimate noise level in image"""
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if len(img.shape) == 3 else img
-        
+    def _estimate_noise(self, gray) -> float:
+        """Estimate noise level in a grayscale image"""
         # Use Laplacian variance as noise estimate
-        laplacian = cv2.Laplacian(gray, cv2.CV_64F)
-        noise = np.var(laplacian)
+        # float32 holds a uint8 Laplacian exactly; accumulate the variance in float64
+        laplacian = cv2.Laplacian(gray, cv2.CV_32F)
+        if isinstance(laplacian, cv2.UMat):
+            # Reduce on the device rather than downloading the whole response
+            _, std = cv2.meanStdDev(laplacian)
+            return float(std.get()[0, 0]) ** 2
+        noise = float(laplacian.var(dtype=np.float64))
         
         return noise
     
-    def _detect_compression_artifacts(self, img) -> bool:
-        """Detect JPEG compression artifacts"""
+    def _detect_compression_artifacts(self, gray) -> bool:
+        """Detect JPEG compression artifacts in a grayscale image"""
         # Simple check: look for block patterns
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if len(img.shape) == 3 else img
-        
         # Check for 8x8 block patterns (JPEG)
         h, w = gray.shape
         if h < 16 or w < 16:
             return False
         
-        # Sample a few blocks
-        block_variances = []
-        for i in range(0, min(h-8, 32), 8):
-            for j in range(0, min(w-8, 32), 8):
-                block = gray[i:i+8, j:j+8]
-                block_variances.append(np.var(block))
+        # Sample up to 4x4 blocks from the top-left, all variances in one vectorized pass
+        rows = -(-min(h - 8, 32) // 8)
+        cols = -(-min(w - 8, 32) // 8)
+        blocks = gray[:rows * 8, :cols * 8].reshape(rows, 8, cols, 8).swapaxes(1, 2)
+        block_variances = blocks.reshape(-1, 64).var(axis=1, dtype=np.float64)
         
         # High variance in block boundaries suggests compression
-        if len(block_variances) > 0:
-            variance_std = np.std(block_variances)
-            return variance_std > 100
-        
-        return False
+        return bool(block_variances.std() > 100)
     
     def _generate_reasoning(self, indicators: List[str], score: float) -> str:
         """Generate human-readable reasoning"""
@@ -0,0 +1,68 @@
+"""
+LLM Response Cache
+Memoizes deterministic (temperature=0) LLM calls so repeated prompts skip the API
+"""
+
+import hashlib
+import threading
+import time
+from typing import Any, Optional
+
+from cachetools import TTLCache
+
+
+class MemoryBackend:
+    """
+    In-process TTL store for cached completions
+    Any object exposing get(key) / set(key, value) can replace it (e.g. Redis)
+    """
+    def __init__(self, maxsize: int = 1024, ttl: int = 3600, timer=time.monotonic):
+        self._store = TTLCache(maxsize=maxsize, ttl=ttl, timer=timer)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self._store.get(key)
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            self._store[key] = value
+
+
+class LLMCache:
+    """
+    Exact-match cache for LLM completions
+    Keyed by sha256 of (model, prompt, temperature); sampled calls are never cached
+    """
+    def __init__(self, backend=None, ttl: int = 3600):
+        self.backend = backend or MemoryBackend(ttl=ttl)
+
+    @staticmethod
+    def cache_key(model: str, messages: Any, temperature: Optional[float]) -> Optional[str]:
+        """Return the cache key, or None when the call is non-deterministic"""
+        if temperature and temperature > 0:
+            return None
+
+        payload = f"{model}\x00{temperature}\x00{_prompt_text(messages)}"
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        return self.backend.get(key)
+
+    def set(self, key: str, value: str):
+        self.backend.set(key, value)
+
+
+def _prompt_text(prompt: Any) -> str:
+    """Flatten a string, PromptValue or message list into stable text for hashing"""
+    if hasattr(prompt, 'to_messages'):
+        prompt = prompt.to_messages()
+
+    if isinstance(prompt, (list, tuple)):
+        return "\n".join(
+            f"{message[0]}:{message[1]}" if isinstance(message, tuple)
+            else f"{getattr(message, 'type', '')}:{getattr(message, 'content', message)}"
+            for message in prompt
+        )
+
+    return str(prompt)
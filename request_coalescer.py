@@ -0,0 +1,70 @@
+"""
+Request Coalescer
+Collapses concurrent identical lookups into a single upstream call
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+class RequestCoalescer:
+    """
+    Single-flight helper shared across threads and event loops.
+    The first caller for a key performs the request; callers arriving while
+    it is in flight wait for and receive the same result (or exception).
+    """
+    def __init__(self):
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def _claim(self, key: Hashable) -> Tuple[Future, bool]:
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future, False
+            future = Future()
+            self._inflight[key] = future
+            return future, True
+
+    def _settle(self, key: Hashable, future: Future, result: Any = None, error: BaseException = None):
+        with self._lock:
+            self._inflight.pop(key, None)
+        if isinstance(error, asyncio.CancelledError):
+            # Owner was cancelled (e.g. asyncio.run tearing down its tasks): waiters see a cancellation
+            future.cancel()
+        elif error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def run(self, key: Hashable, fn: Callable, *args) -> Any:
+        """Call fn(*args) unless an identical call is already in flight"""
+        future, owner = self._claim(key)
+        if not owner:
+            return future.result()
+
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            # Settle even on cancellation/interrupts, or the key would block later callers forever
+            self._settle(key, future, error=e)
+            raise
+        self._settle(key, future, result=result)
+        return result
+
+    async def run_async(self, key: Hashable, coro_fn: Callable, *args) -> Any:
+        """Await coro_fn(*args) unless an identical call is already in flight"""
+        future, owner = self._claim(key)
+        if not owner:
+            return await asyncio.wrap_future(future)
+
+        try:
+            result = await coro_fn(*args)
+        except BaseException as e:
+            # Settle even on cancellation/interrupts, or the key would block later callers forever
+            self._settle(key, future, error=e)
+            raise
+        self._settle(key, future, result=result)
+        return result
@@ -0,0 +1,50 @@
+"""
+Risk Scoring Kernels
+Numeric core of the orchestrator's weighted risk and the voice scam score, JIT-compiled with numba when available
+"""
+
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        """numba not installed: kernels run as plain NumPy/Python"""
+        if args and callable(args[0]):
+            return args[0]
+        return lambda fn: fn
+
+# Indexed by risk_level_id()
+RISK_LEVELS = ('minimal', 'low', 'medium', 'high')
+
+
+@njit(cache=True)
+def weighted_score(scores, confidences, weights):
+    """Confidence- and source-weighted mean score (0-100) of a set of signals"""
+    total_weight = weights.sum()
+    if total_weight <= 0:
+        return 0.0
+    return (scores * weights * confidences).sum() / (100.0 * total_weight)
+
+
+@njit(cache=True)
+def risk_level_id(risk_score):
+    """Bucket a 0-100 risk score into an index of RISK_LEVELS"""
+    if risk_score >= 75:
+        return 3
+    if risk_score >= 50:
+        return 2
+    if risk_score >= 25:
+        return 1
+    return 0
+
+
+@njit(cache=True)
+def scam_indicator_score(urgency, authority, payment, manipulation):
+    """(index of RISK_LEVELS, confidence) from a call's per-category scam indicator counts"""
+    total = urgency + authority + payment + manipulation
+    if total >= 5 or (payment > 0 and urgency > 0):
+        return 3, min(85 + total * 3, 98)
+    if total >= 3:
+        return 2, 60 + total * 5
+    if total >= 1:
+        return 1, 30 + total * 10
+    return 0, 15
@@ -1,15 +1,54 @@
 import re
 import requests
+import threading
 from time import sleep
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None  # fall back to BeautifulSoup's pure-Python parser
 
 SERPER_API_KEY = os.environ.get('SERPER_API_KEY')
 
+_NON_DIGIT = re.compile(r'\D')
+
+# Token bucket for the Serper API: at most SERPER_QPS requests start in any
+# one-second window (each token is handed back a second after it is taken)
+SERPER_QPS = int(os.environ.get('SERPER_QPS', 5))
+_serper_tokens = threading.BoundedSemaphore(SERPER_QPS)
+SERPER_MAX_RETRIES = 3
+
+# Shared keep-alive connection pool for Serper and the result pages
+PAGE_FETCH_WORKERS = 8
+_session = requests.Session()
+_session.mount('https://', HTTPAdapter(pool_connections=16, pool_maxsize=16))
+_session.mount('http://', HTTPAdapter(pool_connections=16, pool_maxsize=16))
+
+# Bytes of each result page actually downloaded; far more markup than the
+# 6000 characters of text kept per page
+PAGE_MAX_BYTES = 256 * 1024
+
+def _take_serper_token():
+    _serper_tokens.acquire()
+    refill = threading.Timer(1.0, _serper_tokens.release)
+    refill.daemon = True
+    refill.start()
+
+def _retry_after(response, attempt):
+    """Seconds to wait after a 429: the Retry-After header, else exponential backoff"""
+    try:
+        return max(0.0, float(response.headers.get('Retry-After', '')))
+    except ValueError:
+        return 2 ** attempt
+
 def generate_phone_number_variants(phone_number):
     # Extract digits from the phone number
-    digits = re.sub(r'\D', '', phone_number)
+    digits = _NON_DIGIT.sub('', phone_number)
 
     # Generate different variants
     variants = []
@@ -20,25 +59,44 @@ def generate_phone_number_variants(phone_number):
     if digits.startswith('+'):
         variants.append(digits[1:].strip())  # No country code, without the '+' sign and trailing newline
 
-    # Remove parentheses and hyphens
-    digits_only = re.sub(r'\D', '', digits)
+    # Generate variants without area code (digits is already free of parentheses and hyphens)
+    if len(digits) > 10:
+        variants.append(digits[len(digits)-10:])  # No area code
+        variants.append(digits[len(digits)-9:])  # No country code, without the first digit
 
-    # Generate variants without area code
-    if len(digits_only) > 10:
-        variants.append(digits_only[len(digits_only)-10:].strip())  # No area code, without trailing newline
-        variants.append(digits_only[len(digits_only)-9:].strip())  # No country code, without the first digit and trailing newline
-
-    return variants
+    # Each variant costs a search plus page scrapes downstream: drop empties and repeats
+    return list(dict.fromkeys(v for v in variants if v))
 
 def get_page_content(url: str) -> str:
     try:
-        html = requests.get(url, timeout=10).text
-        soup = BeautifulSoup(html, 'html.parser')
-        text = soup.get_text(strip=True, separator='\n')
-        return text[:6000]
+        with _session.get(url, timeout=10, stream=True) as response:
+            html = _read_capped(response, PAGE_MAX_BYTES)
+        return html_to_text(html)[:6000]
     except requests.exceptions.RequestException as e:
         return f"Error: {e}"
 
+def _read_capped(response, limit: int) -> str:
+    """Decode at most `limit` bytes of a streamed response body, then stop reading"""
+    body = bytearray()
+    for chunk in response.iter_content(chunk_size=64 * 1024):
+        body += chunk
+        if len(body) >= limit:
+            break
+    try:
+        return body[:limit].decode(response.encoding or 'utf-8', errors='ignore')
+    except LookupError:
+        return body[:limit].decode('utf-8', errors='ignore')
+
+def html_to_text(html: str) -> str:
+    """Visible text of an HTML page, one text node per line (script/style dropped)"""
+    if LexborHTMLParser is None:
+        soup = BeautifulSoup(html, 'html.parser')
+        return soup.get_text(strip=True, separator='\n')
+    
+    tree = LexborHTMLParser(html)
+    tree.strip_tags(['script', 'style', 'template'])
+    return tree.text(separator='\n', strip=True)
+
 def get_search_results(search_query: str):
     url = "https://google.serper.dev/search"
     
@@ -52,13 +110,16 @@ def get_search_results(search_query: str):
         'Content-Type': 'application/json'
     }
     
-    response = requests.post(url, headers=headers, data=payload, timeout=60)
+    for attempt in range(SERPER_MAX_RETRIES + 1):
+        _take_serper_token()
+        response = _session.post(url, headers=headers, data=payload, timeout=60)
+        if response.status_code != 429 or attempt == SERPER_MAX_RETRIES:
+            break
+        sleep(_retry_after(response, attempt))  # back off only when rate limited
     
     if not response.ok:
         raise Exception(f"HTTP error {response.status_code}")
     
-    sleep(1)  # avoid rate limit
-    
     # Parse Serper response format
     results = response.json().get("organic", [])
     
@@ -88,17 +149,20 @@ def checkPhoneLogic(phoneNumberVariants):
                 continue
             
             urls_seen.add(url)
-            page_content = get_page_content(url)
+            web_search_results.append(result)
+    
+    # Page fetches are independent network-bound GETs: run them concurrently, once per URL
+    with ThreadPoolExecutor(max_workers=PAGE_FETCH_WORKERS) as executor:
+        page_contents = executor.map(get_page_content, [result["url"] for result in web_search_results])
+        for result, page_content in zip(web_search_results, page_contents):
             if page_content.startswith("Error:"):
                 result["page_content"] = page_content
             else:
                 result["page_content"] = page_content[:6000]
-            web_search_results.append(result)
-            
 
     formatted_search_results = "\n".join(
             [
-                f'<item index="{i+1}">\n<source>{result.get("url")}</source>\n<page_content>\n{get_page_content(result.get("url"))}\n</page_content>\n</item>'
+                f'<item index="{i+1}">\n<source>{result.get("url")}</source>\n<page_content>\n{result["page_content"]}\n</page_content>\n</item>'
                 for i, result in enumerate(web_search_results)
             ]
         )
@@ -5,72 +5,94 @@ Enterprise-grade omnichannel integration
 """
 
 import os
+import threading
 import time
-from typing import Dict, Optional
+from collections import OrderedDict, deque
+from typing import Callable, Dict, Optional
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# str.translate table deleting the Devanagari block (U+0900-U+097F)
+_DEVANAGARI_DELETE = dict.fromkeys(range(0x0900, 0x0980))
+
+# Longest summary sent in an SMS reply before it is cut with "..." (~300 chars total)
+SMS_SUMMARY_MAX = 200
+
 class ConversationMemory:
     """
     Lightweight conversation memory keyed by phone number
-    Automatically expires after timeout
+    Automatically expires after timeout (measured on the monotonic clock)
     """
-    def __init__(self, timeout_minutes: int = 30):
-        self.sessions = {}  # phone_number -> session_data
+    def __init__(self, timeout_minutes: int = 30, max_history: int = 5,
+                 clock: Callable[[], float] = time.monotonic):
+        # phone_number -> session_data, ordered by expiry (soonest first)
+        self.sessions = OrderedDict()
         self.timeout = timeout_minutes * 60  # Convert to seconds
+        self.max_history = max_history  # Exchanges kept per session
+        self._clock = clock  # Expiry time source; tests pass a fake one
+        # Replies are processed on worker threads; each read/update is one critical section
+        self._lock = threading.Lock()
     
     def get_session(self, phone_number: str) -> Optional[Dict]:
         """Get session data if not expired"""
-        if phone_number not in self.sessions:
-            return None
-        
-        session = self.sessions[phone_number]
-        
-        # Check if expired
-        if time.time() - session['last_activity'] > self.timeout:
-            del self.sessions[phone_number]
-            return None
-        
-        return session
+        with self._lock:
+            session = self.sessions.get(phone_number)
+            if session is None:
+                return None
+            
+            # Check if expired
+            if session['expires_at'] < self._clock():
+                self.sessions.pop(phone_number, None)
+                return None
+            
+            return session
     
     def update_session(self, phone_number: str, message: str, response: str, context: Dict = None):
-        """Update or create session"""
-        if phone_number not in self.sessions:
-            self.sessions[phone_number] = {
-                'history': [],
-                'context': context or {},
-                'created_at': time.time(),
-                'last_activity': time.time()
-            }
-        
-        session = self.sessions[phone_number]
-        session['history'].append({
+        """Update or create session (exchange, activity time and context in one step)"""
+        now = time.time()
+        exchange = {
             'user': message,
             'agent': response,
-            'timestamp': time.time()
-        })
-        
-        # Keep only last 5 exchanges
-        if len(session['history']) > 5:
-            session['history'] = session['history'][-5:]
-        
-        session['last_activity'] = time.time()
+            'timestamp': now
+        }
         
-        # Update context if provided
-        if context:
-            session['context'].update(context)
+        with self._lock:
+            tick = self._clock()
+            # Abandoned numbers are swept here too, not only when they are looked up again
+            self._evict_expired(tick)
+            
+            session = self.sessions.get(phone_number)
+            if session is None:
+                session = self.sessions[phone_number] = {
+                    'history': deque(maxlen=self.max_history),  # Oldest exchange drops out on append
+                    'context': {},
+                    'created_at': now
+                }
+            else:
+                # Most recently active sessions live at the end
+                self.sessions.move_to_end(phone_number)
+            
+            session['history'].append(exchange)
+            session['expires_at'] = tick + self.timeout
+            
+            # Update context if provided
+            if context:
+                session['context'].update(context)
     
     def get_context_summary(self, phone_number: str) -> str:
         """Get conversation context for agent"""
         session = self.get_session(phone_number)
-        if not session or not session['history']:
+        if not session:
             return ""
         
+        with self._lock:
+            recent = list(session['history'])[-3:]  # Last 3 exchanges
+        
         # Build context from recent history
         context_parts = []
-        for exchange in session['history'][-3:]:  # Last 3 exchanges
+        for exchange in recent:
             context_parts.append(f"User: {exchange['user'][:50]}...")
             context_parts.append(f"Agent: {exchange['agent'][:50]}...")
         
@@ -78,12 +100,15 @@ class ConversationMemory:
     
     def clear_expired(self):
         """Clean up expired sessions"""
-        current_time = time.time()
-        expired = [
-            phone for phone, session in self.sessions.items()
-            if current_time - session['last_activity'] > self.timeout
-        ]
-        for phone in expired:
+        with self._lock:
+            self._evict_expired(self._clock())
+    
+    def _evict_expired(self, now: float):
+        """Drop sessions expired by `now` (caller holds the lock); only the stale front is visited"""
+        while self.sessions:
+            phone, session = next(iter(self.sessions.items()))
+            if session['expires_at'] >= now:
+                break
             del self.sessions[phone]
 
 class TwilioService:
@@ -124,8 +149,12 @@ class TwilioService:
         Detect language from message text
         Simple heuristic: check for Hindi Unicode characters
         """
-        # Check for Devanagari script (Hindi)
-        hindi_chars = sum(1 for char in text if '\u0900' <= char <= '\u097F')
+        # Most messages are plain ASCII, which str.isascii() reports without scanning
+        if text.isascii():
+            return 'en'
+        
+        # Check for Devanagari script (Hindi): count by deleting the block in one C-level pass
+        hindi_chars = len(text) - len(text.translate(_DEVANAGARI_DELETE))
         
         # If more than 20% of characters are Hindi, classify as Hindi
         if len(text) > 0 and (hindi_chars / len(text)) > 0.2:
@@ -185,18 +214,16 @@ class TwilioService:
         confidence = int(agent_result.get('confidence', 0))
         summary = agent_result.get('summary', agent_result.get('verdict', ''))
         
-        # Truncate summary for SMS (aim for ~300 chars total)
-        max_summary_length = 200
-        if len(summary) > max_summary_length:
-            summary = summary[:max_summary_length] + "..."
-        
         # Format based on language
         if language == 'hi':
-            response = f"जोखिम: {risk_level} ({confidence}%)\n\n{summary}"
+            header = f"जोखिम: {risk_level} ({confidence}%)\n\n"
         else:
-            response = f"Risk: {risk_level} ({confidence}%)\n\n{summary}"
+            header = f"Risk: {risk_level} ({confidence}%)\n\n"
         
-        return response
+        # Truncate summary for SMS: one slice, one concatenation
+        if len(summary) <= SMS_SUMMARY_MAX:
+            return header + summary
+        return "".join((header, summary[:SMS_SUMMARY_MAX], "..."))
     
     def get_conversation_context(self, phone_number: str) -> str:
         """Get conversation context for phone number"""
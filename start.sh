@@ -29,9 +29,17 @@ if [ ! -d "sentinel-frontend/node_modules" ]; then
 fi
 
 # Start Flask backend in background
+# gunicorn with one threaded worker overlaps requests blocked on upstream APIs;
+# falls back to the Flask dev server when gunicorn is unavailable.
+# Conversation memory, analysis caches and request coalescing live in-process,
+# so every extra worker (WEB_CONCURRENCY) keeps its own copy of that state
 echo ""
 echo "Starting Flask backend on http://localhost:5000..."
-python app.py &
+if command -v gunicorn >/dev/null 2>&1; then
+    gunicorn -k gthread -w "${WEB_CONCURRENCY:-1}" --threads "${GUNICORN_THREADS:-16}" -b 0.0.0.0:${PORT:-5000} --timeout 120 app:app &
+else
+    python app.py &
+fi
 BACKEND_PID=$!
 
 # Wait for backend to start
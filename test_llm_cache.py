@@ -0,0 +1,100 @@
+"""
+LLM Cache Test Suite
+Tests cache keys, hits/misses and TTL expiry without calling an LLM
+"""
+
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from llm_cache import LLMCache, MemoryBackend
+
+def test_cache_key():
+    """Test that the key depends on model, prompt and temperature"""
+    print("\n=== Testing Cache Keys ===")
+    
+    key = LLMCache.cache_key("gpt-4o", "Is this a scam?", 0)
+    assert key == LLMCache.cache_key("gpt-4o", "Is this a scam?", 0), "Same call should give same key"
+    assert key != LLMCache.cache_key("gpt-4o-mini", "Is this a scam?", 0), "Key should depend on model"
+    assert key != LLMCache.cache_key("gpt-4o", "Is this phishing?", 0), "Key should depend on prompt"
+    assert key != LLMCache.cache_key("gpt-4o", "Is this a scam?", None), "Key should depend on temperature"
+    print("✓ Key depends on model, prompt and temperature")
+    
+    assert LLMCache.cache_key("gpt-4o", "Is this a scam?", 0.7) is None, "Sampled calls should not be cached"
+    print("✓ Sampled (temperature > 0) calls get no key")
+    
+    messages = [("system", "Be brief"), ("user", "Hi")]
+    assert LLMCache.cache_key("gpt-4o", messages, 0) == LLMCache.cache_key("gpt-4o", list(messages), 0), \
+        "Equal message lists should give same key"
+    assert LLMCache.cache_key("gpt-4o", messages, 0) != LLMCache.cache_key("gpt-4o", messages[::-1], 0), \
+        "Message order should change the key"
+    print("✓ Message lists are keyed by content and order")
+    
+    print("✅ Cache Keys: ALL TESTS PASSED\n")
+
+def test_hit_and_miss():
+    """Test cache misses, hits and per-key isolation"""
+    print("\n=== Testing Hits and Misses ===")
+    
+    cache = LLMCache()
+    key = LLMCache.cache_key("gpt-4o", "Is this a scam?", 0)
+    assert cache.get(key) is None, "Empty cache should miss"
+    
+    cache.set(key, "Likely a scam")
+    assert cache.get(key) == "Likely a scam", "Stored response should hit"
+    assert cache.get(LLMCache.cache_key("gpt-4o-mini", "Is this a scam?", 0)) is None, \
+        "Other model should miss"
+    print("✓ Hits and misses work")
+    
+    print("✅ Hits and Misses: ALL TESTS PASSED\n")
+
+def test_ttl_expiry():
+    """Test that entries expire after the TTL"""
+    print("\n=== Testing TTL Expiry ===")
+    
+    clock = [0.0]  # Fake clock, advanced by hand instead of sleeping
+    cache = LLMCache(backend=MemoryBackend(ttl=60, timer=lambda: clock[0]))
+    key = LLMCache.cache_key("gpt-4o", "Is this a scam?", 0)
+    cache.set(key, "Likely a scam")
+    
+    clock[0] += 59
+    assert cache.get(key) == "Likely a scam", "Entry should survive within TTL"
+    print("✓ Entry kept within TTL")
+    
+    clock[0] += 2
+    assert cache.get(key) is None, "Entry should expire after TTL"
+    print("✓ Entry expires after TTL")
+    
+    print("✅ TTL Expiry: ALL TESTS PASSED\n")
+
+def run_all_tests():
+    """Run all tests"""
+    print("\n" + "="*60)
+    print("SENTINEL LLM CACHE TEST SUITE")
+    print("="*60)
+    
+    try:
+        test_cache_key()
+        test_hit_and_miss()
+        test_ttl_expiry()
+        
+        print("\n" + "="*60)
+        print("✅ ALL TESTS PASSED")
+        print("="*60)
+        
+        return True
+        
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return False
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -10,13 +10,16 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from services.twilio_client import TwilioService, ConversationMemory
-import time
+
+# One service shared by the stateless tests (memory tests build their own ConversationMemory)
+SERVICE = TwilioService()
 
 def test_conversation_memory():
     """Test conversation memory functionality"""
     print("\n=== Testing Conversation Memory ===")
     
-    memory = ConversationMemory(timeout_minutes=1)  # 1 min for testing
+    clock = [0.0]  # Fake clock, advanced by hand instead of sleeping
+    memory = ConversationMemory(timeout_minutes=1, clock=lambda: clock[0])  # 1 min for testing
     
     # Test session creation
     memory.update_session(
@@ -49,8 +52,7 @@ def test_conversation_memory():
     print("✓ History limiting works (keeps last 5)")
     
     # Test expiry
-    print("  Waiting for session to expire (1 min)...")
-    time.sleep(61)
+    clock[0] += 61  # Past the 1 min timeout
     session = memory.get_session("+1234567890")
     assert session is None, "Session should be expired"
     print("✓ Session expiry works")
@@ -61,7 +63,7 @@ def test_language_detection():
     """Test language detection"""
     print("\n=== Testing Language Detection ===")
     
-    service = TwilioService()
+    service = SERVICE
     
     # Test English
     lang = service.detect_language("Check this URL please")
@@ -88,7 +90,7 @@ def test_message_normalization():
     """Test message normalization"""
     print("\n=== Testing Message Normalization ===")
     
-    service = TwilioService()
+    service = SERVICE
     
     # Mock Twilio message data
     message_data = {
@@ -121,7 +123,7 @@ def test_response_formatting():
     """Test SMS response formatting"""
     print("\n=== Testing Response Formatting ===")
     
-    service = TwilioService()
+    service = SERVICE
     
     # Mock agent result
     agent_result = {
@@ -189,7 +191,7 @@ def test_parse_incoming_message():
     """Test parsing Twilio webhook data"""
     print("\n=== Testing Incoming Message Parsing ===")
     
-    service = TwilioService()
+    service = SERVICE
     
     # Mock Twilio request data (SMS)
     request_data = {
@@ -0,0 +1,82 @@
+"""
+Phone Scoring Test Suite
+Tests that phone search answers are scored from their VERDICT token only
+"""
+
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# agent.py refuses to import without keys; scoring makes no API calls
+os.environ.setdefault('SERPER_API_KEY', 'test')
+os.environ.setdefault('OPENAI_API_KEY', 'test')
+
+from agent import _phone_verdict_score
+
+def test_negated_wording():
+    """Test that answers ruling out scams are not scored as scams"""
+    print("\n=== Testing Negated Wording ===")
+    
+    answers = [
+        "There is no evidence this number is used for scams or phishing.\nVERDICT: SAFE",
+        "No fraud or robocall reports were found; the number belongs to a verified pharmacy.\nVERDICT: SAFE",
+        "The results do not indicate scam, phishing or other suspicious activity.\nVERDICT: UNKNOWN",
+    ]
+    for answer in answers:
+        assert _phone_verdict_score(answer) < 50, f"Benign answer scored as risky: {answer!r}"
+    print("✓ Negated scam wording does not raise the score")
+    
+    print("✅ Negated Wording: ALL TESTS PASSED\n")
+
+def test_verdict_tokens():
+    """Test the score of each verdict token"""
+    print("\n=== Testing Verdict Tokens ===")
+    
+    assert _phone_verdict_score("Multiple users report IRS impersonation calls.\nVERDICT: SCAM") == 75
+    assert _phone_verdict_score("Several unwanted telemarketing complaints.\nVERDICT: SUSPICIOUS") == 50
+    assert _phone_verdict_score("Official customer service line.\nVERDICT: SAFE") == 15
+    assert _phone_verdict_score("Not enough information.\nVERDICT: UNKNOWN") == 40
+    assert _phone_verdict_score("Reported as a scam.\nverdict: scam") == 75, "Token should be case-insensitive"
+    print("✓ Each verdict maps to its score")
+    
+    # Only the final line counts (the answer may quote the instruction)
+    answer = "Not VERDICT: SCAM as some claim; reviews are positive.\nVERDICT: SAFE"
+    assert _phone_verdict_score(answer) == 15, "Last verdict should win"
+    print("✓ Last verdict wins")
+    
+    assert _phone_verdict_score("This number is used for scams and phishing.") is None, \
+        "Answers without a verdict should not be scored from their wording"
+    print("✓ No verdict, no local score")
+    
+    print("✅ Verdict Tokens: ALL TESTS PASSED\n")
+
+def run_all_tests():
+    """Run all tests"""
+    print("\n" + "="*60)
+    print("SENTINEL PHONE SCORING TEST SUITE")
+    print("="*60)
+    
+    try:
+        test_negated_wording()
+        test_verdict_tokens()
+        
+        print("\n" + "="*60)
+        print("✅ ALL TESTS PASSED")
+        print("="*60)
+        
+        return True
+        
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return False
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,223 @@
+"""
+Request Coalescer Test Suite
+Tests single-flight behaviour with concurrent threads and coroutines
+"""
+
+import sys
+import os
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from request_coalescer import RequestCoalescer
+
+CALLERS = 8
+
+def count_claims(coalescer):
+    """Semaphore released each time a caller has claimed or joined a key"""
+    claims = threading.Semaphore(0)
+    claim = coalescer._claim
+    
+    def counted_claim(key):
+        result = claim(key)
+        claims.release()
+        return result
+    
+    coalescer._claim = counted_claim
+    return claims
+
+def wait_for_claims(claims, count):
+    for _ in range(count):
+        assert claims.acquire(timeout=5), "Caller never reached the coalescer"
+
+def test_concurrent_callers_coalesce():
+    """Test that concurrent callers for one key share a single invocation"""
+    print("\n=== Testing Coalescing ===")
+    
+    # Callers that arrive while the first is blocked must not start their own call
+    coalescer = RequestCoalescer()
+    claims = count_claims(coalescer)
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+    
+    def slow_lookup(url):
+        calls.append(url)
+        started.set()
+        release.wait(5)
+        return url
+    
+    with ThreadPoolExecutor(CALLERS) as ex:
+        owner = ex.submit(coalescer.run, 'key', slow_lookup, 'a')
+        started.wait(5)
+        waiters = [ex.submit(coalescer.run, 'key', slow_lookup, 'a') for _ in range(CALLERS - 1)]
+        wait_for_claims(claims, CALLERS)
+        release.set()
+        results = [owner.result(timeout=5)] + [w.result(timeout=5) for w in waiters]
+    
+    assert len(calls) == 1, f"Expected 1 invocation, got {len(calls)}"
+    assert results == ['a'] * CALLERS, "Every caller should get the owner's result"
+    print(f"✓ {CALLERS} concurrent callers share one invocation")
+    
+    print("✅ Coalescing: ALL TESTS PASSED\n")
+
+def test_exception_propagation():
+    """Test that the owner's exception reaches every waiter"""
+    print("\n=== Testing Exception Propagation ===")
+    
+    coalescer = RequestCoalescer()
+    claims = count_claims(coalescer)
+    started = threading.Event()
+    release = threading.Event()
+    
+    def failing_lookup():
+        started.set()
+        release.wait(5)
+        raise ValueError("quota exceeded")
+    
+    with ThreadPoolExecutor(CALLERS) as ex:
+        owner = ex.submit(coalescer.run, 'key', failing_lookup)
+        started.wait(5)
+        waiters = [ex.submit(coalescer.run, 'key', failing_lookup) for _ in range(CALLERS - 1)]
+        wait_for_claims(claims, CALLERS)
+        release.set()
+        errors = []
+        for future in [owner] + waiters:
+            try:
+                future.result(timeout=5)
+            except ValueError as e:
+                errors.append(str(e))
+    
+    assert errors == ["quota exceeded"] * CALLERS, "Every caller should see the exception"
+    print("✓ Exception raised in owner and all waiters")
+    
+    print("✅ Exception Propagation: ALL TESTS PASSED\n")
+
+def test_key_released():
+    """Test that a finished (or failed) call frees its key"""
+    print("\n=== Testing Key Release ===")
+    
+    coalescer = RequestCoalescer()
+    calls = []
+    
+    def lookup():
+        calls.append(1)
+        return len(calls)
+    
+    assert coalescer.run('key', lookup) == 1
+    assert coalescer.run('key', lookup) == 2, "Sequential calls should each run"
+    assert not coalescer._inflight, "No key should stay in flight"
+    print("✓ Key released after success")
+    
+    def failing_lookup():
+        raise RuntimeError("down")
+    
+    try:
+        coalescer.run('key', failing_lookup)
+    except RuntimeError:
+        pass
+    assert not coalescer._inflight, "No key should stay in flight after a failure"
+    assert coalescer.run('key', lookup) == 3, "Key should be usable after a failure"
+    print("✓ Key released after failure")
+    
+    print("✅ Key Release: ALL TESTS PASSED\n")
+
+def test_async_coalescing():
+    """Test run_async: concurrent coroutines share one invocation and its exception"""
+    print("\n=== Testing Async Coalescing ===")
+    
+    coalescer = RequestCoalescer()
+    calls = []
+    
+    async def lookup(url):
+        calls.append(url)
+        await asyncio.sleep(0.01)
+        return url
+    
+    async def gather_lookups():
+        return await asyncio.gather(*(
+            coalescer.run_async('key', lookup, 'a') for _ in range(CALLERS)
+        ))
+    
+    assert asyncio.run(gather_lookups()) == ['a'] * CALLERS, "Every coroutine should get the result"
+    assert len(calls) == 1, f"Expected 1 invocation, got {len(calls)}"
+    assert not coalescer._inflight, "No key should stay in flight"
+    print("✓ Concurrent coroutines share one invocation")
+    
+    async def failing_lookup():
+        await asyncio.sleep(0.01)
+        raise ValueError("quota exceeded")
+    
+    async def gather_failures():
+        return await asyncio.gather(*(
+            coalescer.run_async('key', failing_lookup) for _ in range(CALLERS)
+        ), return_exceptions=True)
+    
+    results = asyncio.run(gather_failures())
+    assert all(isinstance(r, ValueError) for r in results), "Every coroutine should see the exception"
+    assert not coalescer._inflight, "No key should stay in flight after a failure"
+    print("✓ Exception reaches every coroutine")
+    
+    print("✅ Async Coalescing: ALL TESTS PASSED\n")
+
+def test_owner_cancelled():
+    """Test that a cancelled owner coroutine frees its key and releases its waiters"""
+    print("\n=== Testing Owner Cancellation ===")
+    
+    coalescer = RequestCoalescer()
+    
+    async def hanging_lookup():
+        await asyncio.sleep(60)
+    
+    async def cancel_owner():
+        owner = asyncio.create_task(coalescer.run_async('key', hanging_lookup))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(coalescer.run_async('key', hanging_lookup))
+        await asyncio.sleep(0)
+        owner.cancel()
+        return await asyncio.wait_for(asyncio.gather(owner, waiter, return_exceptions=True), 5)
+    
+    results = asyncio.run(cancel_owner())
+    assert all(isinstance(r, asyncio.CancelledError) for r in results), "Owner and waiter should be cancelled"
+    assert not coalescer._inflight, "Cancelled owner should release its key"
+    print("✓ Key released and waiter cancelled")
+    
+    assert coalescer.run('key', lambda: 'fresh') == 'fresh', "Key should be usable after cancellation"
+    print("✓ Later callers run a fresh request")
+    
+    print("✅ Owner Cancellation: ALL TESTS PASSED\n")
+
+def run_all_tests():
+    """Run all tests"""
+    print("\n" + "="*60)
+    print("SENTINEL REQUEST COALESCER TEST SUITE")
+    print("="*60)
+    
+    try:
+        test_concurrent_callers_coalesce()
+        test_exception_propagation()
+        test_key_released()
+        test_async_coalescing()
+        test_owner_cancelled()
+        
+        print("\n" + "="*60)
+        print("✅ ALL TESTS PASSED")
+        print("="*60)
+        
+        return True
+        
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return False
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
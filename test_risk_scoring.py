@@ -0,0 +1,182 @@
+"""
+Risk Scoring Test Suite
+Checks the scoring kernels against the original orchestrator and voice formulas
+"""
+
+import sys
+import os
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from risk_scoring import RISK_LEVELS, risk_level_id, scam_indicator_score, weighted_score
+from agent_orchestrator import AgentOrchestrator, ThreatSignal
+
+def baseline_weighted_score(scores, confidences, weights):
+    """Loop from AgentOrchestrator.calculate_weighted_risk before the kernels"""
+    total_weight = 0
+    weighted_sum = 0
+    for score, confidence, weight in zip(scores, confidences, weights):
+        weighted_sum += score * weight * (confidence / 100)
+        total_weight += weight
+    return (weighted_sum / total_weight) if total_weight > 0 else 0
+
+def baseline_risk_level(risk_score):
+    """Bucketing from AgentOrchestrator.calculate_weighted_risk before the kernels"""
+    if risk_score >= 75:
+        return 'high'
+    elif risk_score >= 50:
+        return 'medium'
+    elif risk_score >= 25:
+        return 'low'
+    return 'minimal'
+
+def baseline_scam_score(urgency, authority, payment, manipulation):
+    """Scoring from VoiceScamAnalyzer.detect_scam_indicators before the kernels"""
+    total_indicators = urgency + authority + payment + manipulation
+    if total_indicators >= 5 or (payment and urgency):
+        return 'high', min(85 + (total_indicators * 3), 98)
+    elif total_indicators >= 3:
+        return 'medium', 60 + (total_indicators * 5)
+    elif total_indicators >= 1:
+        return 'low', 30 + (total_indicators * 10)
+    return 'minimal', 15
+
+# Weight each agent signal source gets (display names resolve to the configured keys)
+EXPECTED_SOURCE_WEIGHTS = {
+    'VirusTotal': 0.35,
+    'URLhaus': 0.25,
+    'DMARC': 0.15,
+    'Serper': 0.10,
+    'Phone Search': 0.20,
+    'phone_search': 0.20,
+    'Voice Analysis': 0.40,
+    'LLM Analysis': 0.05,
+    'Deepfake Detection': 0.05,  # no configured weight
+    'Threat Intelligence': 0.05,
+}
+
+def test_source_weights():
+    """Test the weight each source name resolves to, and its effect on a combined verdict"""
+    print("\n=== Testing Source Weights ===")
+    
+    orchestrator = AgentOrchestrator(llm=None, tools_dict={})
+    for source, expected in EXPECTED_SOURCE_WEIGHTS.items():
+        signal = ThreatSignal(source=source, score=50, confidence=80, evidence='')
+        actual = orchestrator._weights_arr[signal.source_id]
+        assert actual == expected, f"{source}: weight {actual} != {expected}"
+    print(f"✓ {len(EXPECTED_SOURCE_WEIGHTS)} source names get their configured weight")
+    
+    # A flagged URL whose phone lookup came back safe: phone evidence counts at 0.20
+    signals = [
+        ThreatSignal(source='VirusTotal', score=90, confidence=95, evidence=''),
+        ThreatSignal(source='Phone Search', score=15, confidence=60, evidence=''),
+    ]
+    risk = orchestrator.calculate_weighted_risk(signals)
+    assert risk['risk_score'] == 57.7, f"Expected 57.7, got {risk['risk_score']}"
+    assert risk['risk_level'] == 'medium', f"Expected medium, got {risk['risk_level']}"
+    print("✓ VirusTotal 90 + Phone Search 15 -> 57.7 (medium; 75.9 high at the old 0.05)")
+    
+    signals = [
+        ThreatSignal(source='Voice Analysis', score=75, confidence=90, evidence=''),
+        ThreatSignal(source='LLM Analysis', score=30, confidence=70, evidence=''),
+    ]
+    risk = orchestrator.calculate_weighted_risk(signals)
+    assert risk['risk_score'] == 62.3, f"Expected 62.3, got {risk['risk_score']}"
+    assert risk['risk_level'] == 'medium', f"Expected medium, got {risk['risk_level']}"
+    print("✓ Voice Analysis 75 + LLM Analysis 30 -> 62.3 (medium; 44.2 low at the old 0.05)")
+    
+    print("✅ Source Weights: ALL TESTS PASSED\n")
+
+def test_weighted_score():
+    """Test weighted_score against the original loop"""
+    print("\n=== Testing Weighted Score ===")
+    
+    cases = [
+        # (scores, confidences, weights)
+        ([], [], []),                                   # no signals
+        ([80.0, 40.0], [90.0, 60.0], [0.0, 0.0]),       # zero total weight
+        ([100.0], [100.0], [0.35]),
+        ([80.0, 20.0, 0.0], [95.0, 70.0, 50.0], [0.35, 0.25, 0.05]),
+        ([50.0, 50.0], [0.0, 100.0], [0.2, 0.2]),
+    ]
+    for scores, confidences, weights in cases:
+        expected = baseline_weighted_score(scores, confidences, weights)
+        actual = weighted_score(
+            np.array(scores, dtype=np.float64),
+            np.array(confidences, dtype=np.float64),
+            np.array(weights, dtype=np.float64)
+        )
+        assert abs(actual - expected) < 1e-9, f"{scores}/{confidences}/{weights}: {actual} != {expected}"
+    print(f"✓ {len(cases)} cases match, including zero weight")
+    
+    print("✅ Weighted Score: ALL TESTS PASSED\n")
+
+def test_risk_level_boundaries():
+    """Test risk_level_id at and around the 25/50/75 boundaries"""
+    print("\n=== Testing Risk Level Boundaries ===")
+    
+    for risk_score in (0, 24.9, 25, 25.1, 49.9, 50, 74.9, 75, 100):
+        expected = baseline_risk_level(risk_score)
+        actual = RISK_LEVELS[risk_level_id(risk_score)]
+        assert actual == expected, f"{risk_score}: {actual} != {expected}"
+    print("✓ Buckets match at 25/50/75")
+    
+    print("✅ Risk Level Boundaries: ALL TESTS PASSED\n")
+
+def test_scam_indicator_score():
+    """Test scam_indicator_score against the original voice scoring"""
+    print("\n=== Testing Scam Indicator Score ===")
+    
+    cases = [
+        (0, 0, 0, 0),   # minimal
+        (1, 0, 0, 0),   # low
+        (0, 2, 0, 0),
+        (0, 1, 0, 2),   # medium
+        (0, 2, 0, 2),
+        (1, 0, 1, 0),   # payment + urgency shortcut with only 2 indicators
+        (0, 3, 1, 0),   # payment without urgency stays medium
+        (2, 2, 1, 0),   # 5 indicators
+        (5, 5, 5, 5),   # confidence capped at 98
+    ]
+    for counts in cases:
+        expected = baseline_scam_score(*counts)
+        level_id, confidence = scam_indicator_score(*counts)
+        actual = (RISK_LEVELS[level_id], int(confidence))
+        assert actual == expected, f"{counts}: {actual} != {expected}"
+    print(f"✓ {len(cases)} cases match, including the payment+urgency shortcut")
+    
+    print("✅ Scam Indicator Score: ALL TESTS PASSED\n")
+
+def run_all_tests():
+    """Run all tests"""
+    print("\n" + "="*60)
+    print("SENTINEL RISK SCORING TEST SUITE")
+    print("="*60)
+    
+    try:
+        test_weighted_score()
+        test_source_weights()
+        test_risk_level_boundaries()
+        test_scam_indicator_score()
+        
+        print("\n" + "="*60)
+        print("✅ ALL TESTS PASSED")
+        print("="*60)
+        
+        return True
+        
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return False
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -4,87 +4,227 @@ Transcribes audio and detects scam patterns using OpenAI Whisper
 """
 
 import os
-import re
-from openai import OpenAI
-from dotenv import load_dotenv
+import hashlib
+import mimetypes
+import tempfile
+from pathlib import Path
 
-load_dotenv()
+from risk_scoring import RISK_LEVELS, scam_indicator_score
+
+# .env is only needed when the key is not already in the environment
+if not os.environ.get('OPENAI_API_KEY'):
+    from dotenv import load_dotenv
+    load_dotenv()
+
+# Transcripts are untrusted text: RE2 scans them in linear time (the indicator
+# patterns use no backreferences or lookarounds); stdlib re is the fallback
+try:
+    import re2 as re_engine
+except ImportError:
+    import re as re_engine
+
+# Fixed instructions for the reasoning call, by language; only the user message varies
+_REASONING_SYSTEM = {
+    'en': """Analyze the phone call transcript you are given for scam indicators.
+
+Provide a brief, professional analysis explaining:
+1. What patterns were detected
+2. Why they indicate potential scam behavior
+3. What the caller's likely intent is
+
+Keep it concise (3-4 sentences) and analytical, not alarmist.""",
+    'hi': """आपको दिए गए फ़ोन कॉल ट्रांसक्रिप्ट का घोटाले के संकेतकों के लिए विश्लेषण करें।
+
+एक संक्षिप्त, पेशेवर विश्लेषण प्रदान करें जो समझाता है:
+1. कौन से पैटर्न पहचाने गए
+2. वे संभावित घोटाले के व्यवहार को क्यों इंगित करते हैं
+3. कॉलर का संभावित इरादा क्या है
+
+इसे संक्षिप्त (3-4 वाक्य) और विश्लेषणात्मक रखें, अलार्मवादी नहीं।"""
+}
+
+# Per-call user message templates: t=transcript, u/a/p/m=urgency/authority/payment/manipulation counts
+_PROMPT_EN = """Transcript: {t}
+
+Detected indicators:
+- Urgency phrases: {u}
+- Authority impersonation: {a}
+- Payment pressure: {p}
+- Manipulation tactics: {m}"""
+
+_PROMPT_HI = """ट्रांसक्रिप्ट: {t}
+
+पहचाने गए संकेतक:
+- तात्कालिकता वाक्यांश: {u}
+- प्राधिकरण प्रतिरूपण: {a}
+- भुगतान दबाव: {p}
+- हेरफेर रणनीति: {m}"""
+
+# Transcripts shorter than this (stripped) are treated as silence
+MIN_TRANSCRIPT_CHARS = 20
+
+# Seconds before a Whisper/GPT request is abandoned
+OPENAI_TIMEOUT = 60
+
+# Transcripts kept in the on-disk cache; the least recently used are pruned beyond this
+WHISPER_CACHE_MAX_FILES = int(os.environ.get('WHISPER_CACHE_MAX_FILES', 256))
+
+def _fuse_patterns(categories):
+    """
+    Compile every category into one case-insensitive regex, a named group per
+    category, so a transcript is scanned in a single pass
+    """
+    # Inline (?i): the re2 module has no IGNORECASE flag constant
+    return re_engine.compile(
+        "(?i)" + "|".join(
+            f"(?P<{category}>{'|'.join(f'(?:{pattern})' for pattern in patterns)})"
+            for category, patterns in categories.items()
+        )
+    )
 
 class VoiceScamAnalyzer:
-    def __init__(self):
-        self.client = OpenAI(api_key=os.environ.get('OPENAI_API_KEY'))
-        
-        # Scam indicator patterns
-        self.urgency_patterns = [
+    # Scam indicator patterns, by category; compiled once at import and shared by every instance
+    indicator_patterns = {
+        'urgency': (
             r'\b(urgent|immediately|right now|act now|within \d+ (hours?|minutes?))\b',
             r'\b(expire|suspended|blocked|locked|terminated)\b',
             r'\b(last chance|final (notice|warning))\b'
-        ]
-        
-        self.authority_patterns = [
+        ),
+        'authority': (
             r'\b(bank|police|IRS|tax|government|FBI|officer|agent|department)\b',
             r'\b(legal action|arrest|warrant|court|lawsuit)\b',
             r'\b(verify your (identity|account|information))\b'
-        ]
-        
-        self.payment_patterns = [
+        ),
+        'payment': (
             r'\b(gift card|iTunes|Google Play|Amazon card|prepaid)\b',
             r'\b(wire transfer|Western Union|MoneyGram|cryptocurrency|bitcoin)\b',
             r'\b(pay (now|immediately)|send money|transfer funds)\b',
             r'\b(refund|prize|won|lottery|inheritance)\b'
-        ]
-        
-        self.manipulation_patterns = [
+        ),
+        'manipulation': (
             r'\b(don\'t tell anyone|keep this (private|confidential|secret))\b',
             r'\b(you\'re in trouble|serious consequences|penalty)\b',
             r'\b(congratulations|you\'ve been selected|lucky winner)\b'
-        ]
+        )
+    }
+    _indicator_regex = _fuse_patterns(indicator_patterns)
+
+    def __init__(self):
+        # Imported here so importing this module does not pull in openai/httpx/pydantic
+        from openai import OpenAI
+        self.client = OpenAI(api_key=os.environ.get('OPENAI_API_KEY'), timeout=OPENAI_TIMEOUT)
+        # Whisper transcripts keyed by a hash of the audio bytes
+        self._cache_dir = Path(os.environ.get('WHISPER_CACHE', os.path.join(tempfile.gettempdir(), 'whisper_cache')))
 
     def transcribe_audio(self, audio_file_path):
         """
         Transcribe audio file using OpenAI Whisper
+        The same recording (by content) is only uploaded once; later calls reuse the transcript
         """
         try:
+            cache_file, transcript = self._cached_transcript(audio_file_path)
+            if transcript is not None:
+                return transcript
+            
+            # A (name, file, content type) tuple lets httpx stream the open file
+            # into the multipart body in chunks rather than buffering it whole
+            content_type = mimetypes.guess_type(audio_file_path)[0] or 'application/octet-stream'
             with open(audio_file_path, 'rb') as audio_file:
                 transcript = self.client.audio.transcriptions.create(
                     model="whisper-1",
-                    file=audio_file,
+                    file=(Path(audio_file_path).name, audio_file, content_type),
                     response_format="text"
                 )
+            self._store_transcript(cache_file, transcript)
             return transcript
         except Exception as e:
             raise Exception(f"Transcription failed: {str(e)}")
 
+    def _cached_transcript(self, audio_file_path):
+        """
+        (cache file for this audio, its cached transcript or None)
+        """
+        cache_file = self._cache_dir / f"{self._audio_digest(audio_file_path)}.txt"
+        try:
+            transcript = cache_file.read_text(encoding='utf-8')
+        except OSError:
+            return cache_file, None
+        # A hit refreshes the file's mtime, which orders LRU pruning
+        try:
+            os.utime(cache_file)
+        except OSError:
+            pass
+        return cache_file, transcript
+
+    @staticmethod
+    def _audio_digest(audio_file_path):
+        """
+        BLAKE2b digest of the audio bytes, read in chunks
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        with open(audio_file_path, 'rb') as audio_file:
+            for chunk in iter(lambda: audio_file.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _store_transcript(self, cache_file, transcript):
+        """
+        Write a transcript to the cache atomically, then prune it to WHISPER_CACHE_MAX_FILES
+        A cache failure never fails the analysis
+        """
+        try:
+            # Transcripts of private calls: readable by this user only
+            self._cache_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=self._cache_dir,
+                                             suffix='.tmp', delete=False) as tmp_file:
+                tmp_file.write(transcript)
+            os.replace(tmp_file.name, cache_file)
+            self._prune_cache()
+        except OSError:
+            pass
+
+    def _prune_cache(self):
+        """
+        Delete all but the WHISPER_CACHE_MAX_FILES most recently used transcripts
+        """
+        entries = []
+        for entry in os.scandir(self._cache_dir):
+            if entry.name.endswith('.txt'):
+                try:
+                    entries.append((entry.stat().st_mtime, entry.path))
+                except OSError:
+                    pass
+        if len(entries) <= WHISPER_CACHE_MAX_FILES:
+            return
+        entries.sort(reverse=True)
+        for _, path in entries[WHISPER_CACHE_MAX_FILES:]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
     def detect_scam_indicators(self, transcript):
         """
         Analyze transcript for scam indicators
-        Returns structured analysis with confidence scores
+        Returns structured analysis with confidence scores (indicators as per-category match counts)
         """
-        transcript_lower = transcript.lower()
-        
-        indicators = {
-            'urgency': self._check_patterns(transcript_lower, self.urgency_patterns),
-            'authority': self._check_patterns(transcript_lower, self.authority_patterns),
-            'payment': self._check_patterns(transcript_lower, self.payment_patterns),
-            'manipulation': self._check_patterns(transcript_lower, self.manipulation_patterns)
-        }
+        # One pass over the transcript; each match is counted under the category that fired
+        indicators = dict.fromkeys(self.indicator_patterns, 0)
+        for match in self._indicator_regex.finditer(transcript):
+            indicators[match.lastgroup] += 1
         
         # Calculate confidence scores
-        total_indicators = sum(len(matches) for matches in indicators.values())
+        total_indicators = sum(indicators.values())
         
         # Determine risk level based on indicator count and types
-        if total_indicators >= 5 or (indicators['payment'] and indicators['urgency']):
-            risk_level = 'high'
-            confidence = min(85 + (total_indicators * 3), 98)
-        elif total_indicators >= 3:
-            risk_level = 'medium'
-            confidence = 60 + (total_indicators * 5)
-        elif total_indicators >= 1:
-            risk_level = 'low'
-            confidence = 30 + (total_indicators * 10)
-        else:
-            risk_level = 'minimal'
-            confidence = 15
+        level_id, confidence = scam_indicator_score(
+            indicators['urgency'],
+            indicators['authority'],
+            indicators['payment'],
+            indicators['manipulation']
+        )
+        risk_level = RISK_LEVELS[level_id]
+        confidence = int(confidence)
         
         return {
             'indicators': indicators,
@@ -93,16 +233,6 @@ class VoiceScamAnalyzer:
             'confidence': confidence
         }
 
-    def _check_patterns(self, text, patterns):
-        """
-        Check text against pattern list and return matches
-        """
-        matches = []
-        for pattern in patterns:
-            found = re.findall(pattern, text, re.IGNORECASE)
-            matches.extend(found)
-        return matches
-
     def analyze_call(self, audio_file_path, language='en'):
         """
         Complete call analysis pipeline with multilingual support
@@ -116,11 +246,19 @@ class VoiceScamAnalyzer:
             # Step 1: Transcribe
             transcript = self.transcribe_audio(audio_file_path)
             
+            # Silent or garbled audio: nothing to scan or reason about
+            if not transcript or len(transcript.strip()) < MIN_TRANSCRIPT_CHARS:
+                return self._empty_verdict(transcript, language)
+            
             # Step 2: Detect scam patterns
             scam_analysis = self.detect_scam_indicators(transcript)
             
-            # Step 3: Generate AI reasoning (language-aware)
-            reasoning = self._generate_reasoning(transcript, scam_analysis, language)
+            # Step 3: Generate AI reasoning (language-aware); clear-cut verdicts
+            # (no indicators, or near-certain scam) skip the GPT round trip
+            if scam_analysis['risk_level'] == 'minimal' or scam_analysis['confidence'] >= 95:
+                reasoning = self._template_reasoning(scam_analysis, language)
+            else:
+                reasoning = self._generate_reasoning(transcript, scam_analysis, language)
             
             return {
                 'transcript': transcript,
@@ -141,44 +279,22 @@ class VoiceScamAnalyzer:
         CRITICAL: LLM must think natively in the target language
         """
         try:
-            if language == 'hi':
-                prompt = f"""इस फ़ोन कॉल ट्रांसक्रिप्ट का घोटाले के संकेतकों के लिए विश्लेषण करें।
-
-ट्रांसक्रिप्ट: {transcript}
-
-पहचाने गए संकेतक:
-- तात्कालिकता वाक्यांश: {len(analysis['indicators']['urgency'])}
-- प्राधिकरण प्रतिरूपण: {len(analysis['indicators']['authority'])}
-- भुगतान दबाव: {len(analysis['indicators']['payment'])}
-- हेरफेर रणनीति: {len(analysis['indicators']['manipulation'])}
-
-एक संक्षिप्त, पेशेवर विश्लेषण प्रदान करें जो समझाता है:
-1. कौन से पैटर्न पहचाने गए
-2. वे संभावित घोटाले के व्यवहार को क्यों इंगित करते हैं
-3. कॉलर का संभावित इरादा क्या है
-
-इसे संक्षिप्त (3-4 वाक्य) और विश्लेषणात्मक रखें, अलार्मवादी नहीं।"""
-            else:
-                prompt = f"""Analyze this phone call transcript for scam indicators.
-
-Transcript: {transcript}
-
-Detected indicators:
-- Urgency phrases: {len(analysis['indicators']['urgency'])}
-- Authority impersonation: {len(analysis['indicators']['authority'])}
-- Payment pressure: {len(analysis['indicators']['payment'])}
-- Manipulation tactics: {len(analysis['indicators']['manipulation'])}
-
-Provide a brief, professional analysis explaining:
-1. What patterns were detected
-2. Why they indicate potential scam behavior
-3. What the caller's likely intent is
-
-Keep it concise (3-4 sentences) and analytical, not alarmist."""
+            # Static instructions first, so identical prefixes can hit OpenAI's prompt cache
+            counts = analysis['indicators']
+            user_message = (_PROMPT_HI if language == 'hi' else _PROMPT_EN).format(
+                t=transcript,
+                u=counts['urgency'],
+                a=counts['authority'],
+                p=counts['payment'],
+                m=counts['manipulation']
+            )
 
             response = self.client.chat.completions.create(
                 model="gpt-4o",
-                messages=[{"role": "user", "content": prompt}],
+                messages=[
+                    {"role": "system", "content": _REASONING_SYSTEM.get(language, _REASONING_SYSTEM['en'])},
+                    {"role": "user", "content": user_message}
+                ],
                 temperature=0.3,
                 max_tokens=200
             )
@@ -188,6 +304,44 @@ Keep it concise (3-4 sentences) and analytical, not alarmist."""
         except Exception as e:
             return f"Unable to generate detailed reasoning: {str(e)}"
 
+    def _template_reasoning(self, analysis, language='en'):
+        """
+        Reasoning built from the indicator counts, for verdicts GPT would not change
+        """
+        counts = analysis['indicators']
+        
+        if language == 'hi':
+            return (
+                f"{counts['urgency']} तात्कालिकता, {counts['authority']} प्राधिकरण, "
+                f"{counts['payment']} भुगतान और {counts['manipulation']} हेरफेर संकेतक पहचाने गए; "
+                f"वर्गीकरण स्पष्ट है।"
+            )
+        return (
+            f"Detected {counts['urgency']} urgency, {counts['authority']} authority, "
+            f"{counts['payment']} payment and {counts['manipulation']} manipulation cues; "
+            f"classification is unambiguous."
+        )
+
+    def _empty_verdict(self, transcript, language='en'):
+        """
+        analyze_call result for a transcript too short to analyze
+        """
+        analysis = {
+            'indicators': dict.fromkeys(self.indicator_patterns, 0),
+            'total_indicator_count': 0,
+            'risk_level': 'minimal',
+            'confidence': 10
+        }
+        return {
+            'transcript': transcript,
+            'scam_indicators': analysis['indicators'],
+            'total_indicators': 0,
+            'risk_level': 'minimal',
+            'confidence': 10,
+            'reasoning': 'अपर्याप्त ऑडियो सामग्री' if language == 'hi' else 'Insufficient audio content',
+            'verdict': self._generate_verdict(analysis, language)
+        }
+
     def _generate_verdict(self, analysis, language='en'):
         """
         Generate clear verdict based on analysis in specified language